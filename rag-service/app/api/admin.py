@@ -225,11 +225,12 @@ async def manage_cache(
             # Clear cache
             if request.patterns:
                 cleared = 0
-                for pattern in request.patterns:
-                    keys = await cache_service.redis.keys(pattern)
-                    if keys:
-                        await cache_service.redis.delete(*keys)
-                        cleared += len(keys)
+                async with cache_service.session() as conn:
+                    for pattern in request.patterns:
+                        keys = await conn.keys(pattern)
+                        if keys:
+                            await conn.delete(*keys)
+                            cleared += len(keys)
                 return {
                     "status": "success",
                     "action": "clear",
@@ -237,7 +238,7 @@ async def manage_cache(
                 }
             else:
                 # Clear all
-                await cache_service.redis.flushdb()
+                await cache_service.redis_client.flushdb()
                 return {
                     "status": "success",
                     "action": "clear",
@@ -280,14 +281,17 @@ async def manage_cache(
             }
         
         elif request.action == "stats":
-            # Get cache statistics
-            info = await cache_service.redis.info()
-            
-            # Get key count by pattern
+            # Get cache statistics and key counts by pattern in one round-trip
+            key_patterns = ["retrieval:*", "llm:*", "embedding:*"]
+            async with cache_service.redis_client.pipeline(transaction=False) as pipe:
+                pipe.info()
+                for pattern in key_patterns:
+                    pipe.keys(pattern)
+                info, *pattern_keys = await pipe.execute()
+                
             patterns = {
-                "retrieval:*": len(await cache_service.redis.keys("retrieval:*")),
-                "llm:*": len(await cache_service.redis.keys("llm:*")),
-                "embedding:*": len(await cache_service.redis.keys("embedding:*"))
+                pattern: len(keys)
+                for pattern, keys in zip(key_patterns, pattern_keys)
             }
             
             return {
@@ -21,7 +21,7 @@ from app.models.query import (
 from app.pipelines.enhanced_retrieval import EnhancedRetrievalPipeline
 from app.pipelines.query_optimizer import QueryOptimizer
 from app.services.cache import QueryCache
-from app.services.advanced_cache import AdvancedCacheService, create_context_hash
+from app.services.advanced_cache import get_advanced_cache_service, create_context_hash
 from app.services.performance_monitor import get_performance_monitor
 from app.utils.langchain_utils import RetryableLLM, handle_llm_error
 from app.api.streaming import create_streaming_response
@@ -30,7 +30,7 @@ from app.components.ensemble_retriever import WeightedEnsembleRetriever
 from app.components.contextual_compressor import TravelContextualCompressor
 from app.components.reranker import CrossEncoderReranker
 from app.components.table_query_rewriter import TableQueryRewriter
-from app.services.llm_pool import LLMPool
+from app.services.llm_pool import get_llm_pool
 
 logger = get_logger(__name__)
 
@@ -137,10 +137,8 @@ async def chat(request: Request, chat_request: ChatRequest) -> ChatResponse:
         document_store = app.state.document_store
         cache_service = getattr(app.state, "cache_service", None)
         
-        # Initialize advanced cache if available
-        advanced_cache = None
-        if cache_service:
-            advanced_cache = AdvancedCacheService(cache_service)
+        # Process-wide advanced cache, if the cache is available
+        advanced_cache = get_advanced_cache_service() if cache_service else None
         
         # Initialize components using asyncio.to_thread for blocking operations
         logger.info("Creating LLM...")
@@ -243,8 +241,9 @@ async def chat(request: Request, chat_request: ChatRequest) -> ChatResponse:
                 llm=llm.llm if hasattr(llm, 'llm') else llm
             )
             
-            # Get LLM pool from app state
-            llm_pool = getattr(app.state, "llm_pool", None) or LLMPool()
+            # Share the process-wide pool; a fresh pool per request would
+            # re-create and re-warm its connections every time
+            llm_pool = getattr(app.state, "llm_pool", None) or get_llm_pool()
             
             # Create enhanced retrieval pipeline
             retrieval_pipeline = EnhancedRetrievalPipeline(
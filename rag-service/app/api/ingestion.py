@@ -2,7 +2,10 @@
 
 from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, Query
 from typing import List, Optional
+import asyncio
+import json
 import os
+import shutil
 import tempfile
 from datetime import datetime
 import uuid
@@ -15,12 +18,15 @@ from app.models.documents import (
 from app.pipelines.ingestion import IngestionPipeline
 from app.services.cache import CacheService
 from app.api.websocket import progress_tracker
-from app.api.progress import send_progress_update, close_progress_stream
+from app.api.progress import send_progress_update, close_progress_stream, url_operation_id
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Uploads are copied to disk in blocks of this size rather than read whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 @router.post("/database/purge")
 async def purge_database(request: Request) -> dict:
@@ -51,6 +57,8 @@ async def purge_database(request: Request) -> dict:
                 status_code=501, 
                 detail="Vector store does not support purge operation"
             )
+        # Invalidate listing/count/corpus caches keyed on the store version
+        await vector_store_manager.bump_version()
         
         # Clear cache if available
         if cache_service:
@@ -93,19 +101,13 @@ async def ingest_document(
         # Create ingestion pipeline
         pipeline = IngestionPipeline(vector_store, cache_service)
         
-        # Create operation ID based on URL or content hash
+        # Create operation ID based on URL or content hash; URL IDs are
+        # stable across workers so progress streams can find them
         if ingestion_request.url:
-            operation_id = f"url_{hash(ingestion_request.url)}"
+            operation_id = url_operation_id(ingestion_request.url)
         else:
             operation_id = f"ingest_{int(datetime.utcnow().timestamp())}"
         
-        # Store URL mapping for progress tracking
-        if ingestion_request.url:
-            # Store URL -> operation_id mapping (in-memory for now)
-            if not hasattr(app.state, 'url_operations'):
-                app.state.url_operations = {}
-            app.state.url_operations[ingestion_request.url] = operation_id
-        
         async def progress_callback(event_type: str, data: dict):
             await send_progress_update(operation_id, event_type, data)
         
@@ -158,18 +160,45 @@ async def ingest_file(
             else:
                 raise ValueError(f"Unsupported file type: {file_extension}")
                 
-        # Save uploaded file temporarily
+        # Parse metadata
+        metadata_dict = json.loads(metadata)
+        metadata_dict["original_filename"] = file.filename
+        
+        # Get services
+        app = request.app
+        vector_store = app.state.vector_store_manager
+        cache_service = getattr(app.state, "cache_service", None)
+        pipeline = IngestionPipeline(vector_store, cache_service)
+        
+        if doc_type == DocumentType.TEXT:
+            # Plain text needs no parser; ingest the decoded upload as direct
+            # content rather than writing it out for TextLoader to read back.
+            # Carry the file metadata the loader path would have set, so the
+            # upload is not filed under the shared "direct_input" source.
+            metadata_dict.setdefault("source", file.filename)
+            metadata_dict.setdefault("source_type", "file")
+            metadata_dict.setdefault("file_name", file.filename)
+            metadata_dict.setdefault("file_extension", file_extension)
+            data = await file.read()
+            ingestion_request = DocumentIngestionRequest(
+                # Decoding a large upload would stall every other request
+                content=await asyncio.to_thread(data.decode, "utf-8"),
+                type=doc_type,
+                metadata=metadata_dict,
+                force_refresh=force_refresh
+            )
+            return await pipeline.ingest_document(ingestion_request)
+            
+        # Other formats go through loaders that need a real path
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            # Copy block by block in a worker thread so large uploads neither
+            # sit in memory whole nor block the event loop on disk writes
+            await asyncio.to_thread(
+                shutil.copyfileobj, file.file, tmp_file, UPLOAD_CHUNK_SIZE
+            )
             tmp_file_path = tmp_file.name
             
         try:
-            # Parse metadata
-            import json
-            metadata_dict = json.loads(metadata)
-            metadata_dict["original_filename"] = file.filename
-            
             # Create ingestion request
             ingestion_request = DocumentIngestionRequest(
                 file_path=tmp_file_path,
@@ -178,13 +207,6 @@ async def ingest_file(
                 force_refresh=force_refresh
             )
             
-            # Get services
-            app = request.app
-            vector_store = app.state.vector_store_manager
-            cache_service = getattr(app.state, "cache_service", None)
-            
-            # Create pipeline and ingest
-            pipeline = IngestionPipeline(vector_store, cache_service)
             response = await pipeline.ingest_document(ingestion_request)
             
             return response
@@ -338,4 +360,25 @@ async def delete_document(request: Request, document_id: str) -> dict:
         raise
     except Exception as e:
         logger.error(f"Document deletion failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/documents/delete")
+async def delete_documents(request: Request, document_ids: List[str]) -> dict:
+    """Delete several documents and all their chunks in one operation."""
+    try:
+        # Get document store
+        app = request.app
+        document_store = app.state.document_store
+        
+        deleted_chunks = await document_store.delete_many(document_ids)
+        
+        return {
+            "status": "success",
+            "documents": len(document_ids),
+            "deleted_chunks": deleted_chunks
+        }
+        
+    except Exception as e:
+        logger.error(f"Batch document deletion failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
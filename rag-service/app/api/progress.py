@@ -3,55 +3,195 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 import asyncio
-import json
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, Optional, Set
+import redis.asyncio as redis
 
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.cache import get_cache_service, json_dumps
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
-# Global store for progress updates
+# Global store for progress updates when Redis is not available
 progress_queues: Dict[str, asyncio.Queue] = {}
 
+# Progress events are published on "progress:<operation_id>" so a stream
+# opened on one worker sees updates from an ingestion running on another
+PROGRESS_CHANNEL_PREFIX = "progress:"
+
+# Published form of the close sentinel (None)
+CLOSE_MESSAGE = json_dumps(None)
+HEARTBEAT_EVENT = json_dumps({"type": "heartbeat"})
+
+
+def url_operation_id(url: str) -> str:
+    """Operation ID for a URL ingestion, identical in every worker process."""
+    # str hash() is randomized per process, so it cannot be shared
+    return f"url_{hashlib.blake2b(url.encode(), digest_size=8).hexdigest()}"
+
+
+def _progress_redis():
+    """Shared Redis client for progress events, if the cache is connected."""
+    cache = get_cache_service()
+    if cache and cache.enabled and cache.redis_client:
+        return cache.redis_client
+    return None
+
+
+class _ProgressSubscriber:
+    """One Redis subscription per worker, fanned out to local progress streams.
+    
+    Each open stream used to hold its own pubsub connection from the cache
+    pool; enough viewers exhausted it and broke every cache call. A single
+    pattern subscription on a dedicated connection serves all streams.
+    """
+    
+    def __init__(self):
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+    def listen(self, operation_id: str) -> asyncio.Queue:
+        """Register a queue receiving the operation's published messages."""
+        queue = asyncio.Queue()
+        self._listeners.setdefault(operation_id, set()).add(queue)
+        self.ensure_running()
+        return queue
+        
+    def unlisten(self, operation_id: str, queue: asyncio.Queue):
+        """Drop a stream's queue."""
+        queues = self._listeners.get(operation_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._listeners[operation_id]
+                
+    def ensure_running(self):
+        """Start (or restart after a failure) the reader task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            
+    async def close(self):
+        """Stop the reader task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+            
+    async def _run(self):
+        """Read every progress channel and dispatch to registered queues."""
+        # Own connection, outside the bounded cache pool
+        client = redis.Redis.from_url(
+            settings.redis_url, encoding="utf-8", decode_responses=True
+        )
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{PROGRESS_CHANNEL_PREFIX}*")
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=30.0
+                )
+                if message is None:
+                    continue
+                operation_id = message["channel"][len(PROGRESS_CHANNEL_PREFIX):]
+                for queue in self._listeners.get(operation_id, ()):
+                    queue.put_nowait(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Progress subscriber failed: {e}")
+        finally:
+            await pubsub.close()
+            await client.close()
+
+
+_subscriber = _ProgressSubscriber()
+
+
+async def close_progress_subscriber():
+    """Stop this worker's shared progress subscription."""
+    await _subscriber.close()
+
+
+async def _publish(operation_id: str, event: Optional[Dict[str, Any]]) -> bool:
+    """Publish an event (None closes the stream) to every worker's subscribers."""
+    client = _progress_redis()
+    if client is None:
+        return False
+    await client.publish(f"{PROGRESS_CHANNEL_PREFIX}{operation_id}", json_dumps(event))
+    return True
+
 
 @router.get("/progress/{operation_id}")
 async def stream_progress(request: Request, operation_id: str):
     """Stream progress updates for an operation."""
     
-    async def event_generator():
-        """Generate SSE events."""
+    # Both sources yield SSE-ready JSON text, or None once the stream is closed
+    async def queue_events():
+        """Yield events sent to this process's queue."""
         # Create a queue for this client
         queue = asyncio.Queue()
         progress_queues[operation_id] = queue
         
         try:
-            # Send initial connection event
-            yield f"data: {json.dumps({'type': 'connected', 'operation_id': operation_id})}\n\n"
-            
-            # Send events from queue
             while True:
                 try:
                     # Wait for event with timeout
                     event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    
-                    if event is None:  # Sentinel to close stream
-                        break
-                        
-                    yield f"data: {json.dumps(event)}\n\n"
-                    
+                    yield None if event is None else json_dumps(event)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_EVENT
+        finally:
+            # Clean up
+            if operation_id in progress_queues:
+                del progress_queues[operation_id]
+                
+    async def channel_events():
+        """Yield events published on the operation's Redis channel."""
+        queue = _subscriber.listen(operation_id)
+        
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=30.0)
                 except asyncio.TimeoutError:
-                    # Send heartbeat to keep connection alive
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                    # Restart the shared reader if it died on a Redis error
+                    _subscriber.ensure_running()
+                    yield HEARTBEAT_EVENT
+                    continue
+                if data == CLOSE_MESSAGE:
+                    yield None
+                else:
+                    # Already JSON as published; forward it without a decode/re-encode
+                    yield data
+        finally:
+            _subscriber.unlisten(operation_id, queue)
+    
+    async def event_generator():
+        """Generate SSE events."""
+        events = channel_events() if _progress_redis() is not None else queue_events()
+        
+        try:
+            # Send initial connection event
+            yield f"data: {json_dumps({'type': 'connected', 'operation_id': operation_id})}\n\n"
+            
+            # Send events until the sentinel closes the stream
+            async for event in events:
+                if event is None:
+                    break
                     
+                yield f"data: {event}\n\n"
+                
         except asyncio.CancelledError:
             logger.info(f"Progress stream cancelled for {operation_id}")
             
         finally:
-            # Clean up
-            if operation_id in progress_queues:
-                del progress_queues[operation_id]
+            await events.aclose()
                 
     return StreamingResponse(
         event_generator(),
@@ -66,19 +206,26 @@ async def stream_progress(request: Request, operation_id: str):
 
 async def send_progress_update(operation_id: str, event_type: str, data: Dict[str, Any]):
     """Send progress update to connected clients."""
-    if operation_id in progress_queues:
-        try:
-            event = {
-                "type": event_type,
-                **data
-            }
+    try:
+        event = {
+            "type": event_type,
+            **data
+        }
+        if await _publish(operation_id, event):
+            return
+        if operation_id in progress_queues:
             await progress_queues[operation_id].put(event)
-        except Exception as e:
-            logger.error(f"Failed to send progress update: {e}")
+    except Exception as e:
+        logger.error(f"Failed to send progress update: {e}")
 
 
 async def close_progress_stream(operation_id: str):
     """Close progress stream for an operation."""
+    try:
+        if await _publish(operation_id, None):
+            return
+    except Exception as e:
+        logger.error(f"Failed to close progress stream: {e}")
     if operation_id in progress_queues:
         await progress_queues[operation_id].put(None)
 
@@ -86,19 +233,6 @@ async def close_progress_stream(operation_id: str):
 @router.get("/ingest/progress")
 async def stream_progress_by_url(request: Request, url: str):
     """Stream progress updates for a URL ingestion."""
-    # Get operation ID from URL mapping
-    app = request.app
-    url_operations = getattr(app.state, 'url_operations', {})
-    
-    # Try to find existing operation for this URL
-    operation_id = url_operations.get(url)
-    
-    # If no existing operation, create a new one
-    if not operation_id:
-        operation_id = f"url_{hash(url)}"
-        if not hasattr(app.state, 'url_operations'):
-            app.state.url_operations = {}
-        app.state.url_operations[url] = operation_id
-    
-    # Use the existing stream_progress function
-    return await stream_progress(request, operation_id)
\ No newline at end of file
+    # The operation ID is derived from the URL, so any worker can find it
+    # without a per-process URL -> operation registry
+    return await stream_progress(request, url_operation_id(url))
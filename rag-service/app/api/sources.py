@@ -1,7 +1,9 @@
 """Source management API endpoints."""
 
 from fastapi import APIRouter, Request, HTTPException, Query
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import time
 
 from app.core.logging import get_logger
 from app.models.documents import (
@@ -13,6 +15,54 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Seconds a per-source breakdown is reused while the corpus is unchanged
+SOURCE_STATS_TTL = 30
+
+# Most chunks read to reconstruct the per-source breakdown; there is no
+# source table, so the breakdown is rebuilt from chunk metadata
+SOURCE_STATS_SCAN_LIMIT = 1000
+
+# (corpus version, chunk count, built at, sources) of the last breakdown
+_source_stats_cache: Optional[Tuple[Any, int, float, List[Dict[str, Any]]]] = None
+
+
+def _build_source_stats(collection) -> List[Dict[str, Any]]:
+    """Group chunk metadata by source into per-source counts."""
+    # Only a bounded window of chunks is read; the caller flags the
+    # breakdown as truncated when the collection is larger
+    results = collection.get(
+        limit=SOURCE_STATS_SCAN_LIMIT,
+        include=["metadatas"]
+    )
+    
+    # Group by source
+    source_counts = {}
+    if results and "metadatas" in results:
+        for metadata in results["metadatas"]:
+            if metadata and "source" in metadata:
+                source = metadata["source"]
+                if source not in source_counts:
+                    source_counts[source] = {
+                        "source": source,
+                        "document_count": 0,
+                        "chunk_count": 0,
+                        "last_updated": metadata.get("created_at", "")
+                    }
+                source_counts[source]["chunk_count"] += 1
+                # Update last_updated if this one is newer
+                if metadata.get("created_at", "") > source_counts[source]["last_updated"]:
+                    source_counts[source]["last_updated"] = metadata.get("created_at", "")
+    
+    # Convert to list
+    sources = list(source_counts.values())
+    
+    # Estimate document count (chunks with same parent_id are one document)
+    for source_info in sources:
+        # Rough estimate: assume average 10 chunks per document
+        source_info["document_count"] = max(1, source_info["chunk_count"] // 10)
+        
+    return sources
+
 
 @router.post("/sources/search")
 async def search_sources(
@@ -71,7 +121,10 @@ async def list_sources(
 
 
 @router.get("/sources/stats")
-async def get_source_stats(request: Request) -> Dict[str, Any]:
+async def get_source_stats(
+    request: Request,
+    detailed: bool = Query(True, description="Include the per-source breakdown")
+) -> Dict[str, Any]:
     """Get statistics about indexed sources."""
     try:
         # Get vector store
@@ -86,40 +139,25 @@ async def get_source_stats(request: Request) -> Dict[str, Any]:
         
         # For ChromaDB, we need to get more detailed stats
         sources = []
-        if hasattr(vector_store_manager.vector_store, "_collection"):
+        if detailed and hasattr(vector_store_manager.vector_store, "_collection"):
             try:
-                # Get all documents to count by source
-                # Note: In production, this should be optimized with proper queries
-                results = vector_store_manager.vector_store._collection.get(
-                    limit=1000,  # Reasonable limit
-                    include=["metadatas"]
-                )
-                
-                # Group by source
-                source_counts = {}
-                if results and "metadatas" in results:
-                    for metadata in results["metadatas"]:
-                        if metadata and "source" in metadata:
-                            source = metadata["source"]
-                            if source not in source_counts:
-                                source_counts[source] = {
-                                    "source": source,
-                                    "document_count": 0,
-                                    "chunk_count": 0,
-                                    "last_updated": metadata.get("created_at", "")
-                                }
-                            source_counts[source]["chunk_count"] += 1
-                            # Update last_updated if this one is newer
-                            if metadata.get("created_at", "") > source_counts[source]["last_updated"]:
-                                source_counts[source]["last_updated"] = metadata.get("created_at", "")
-                
-                # Convert to list
-                sources = list(source_counts.values())
-                
-                # Estimate document count (chunks with same parent_id are one document)
-                for source_info in sources:
-                    # Rough estimate: assume average 10 chunks per document
-                    source_info["document_count"] = max(1, source_info["chunk_count"] // 10)
+                # Reuse the last breakdown while no writes have happened since
+                global _source_stats_cache
+                version = await vector_store_manager.get_version()
+                cached = _source_stats_cache
+                if (
+                    cached
+                    and cached[0] == version
+                    and cached[1] == total_documents
+                    and time.monotonic() - cached[2] < SOURCE_STATS_TTL
+                ):
+                    sources = cached[3]
+                else:
+                    # The scan is blocking Chroma I/O; keep it off the event loop
+                    sources = await asyncio.to_thread(
+                        _build_source_stats, vector_store_manager.vector_store._collection
+                    )
+                    _source_stats_cache = (version, total_documents, time.monotonic(), sources)
                     
             except Exception as e:
                 logger.warning(f"Could not get detailed source stats: {e}")
@@ -128,6 +166,7 @@ async def get_source_stats(request: Request) -> Dict[str, Any]:
             "total_documents": total_documents,
             "total_chunks": total_documents,  # ChromaDB counts all chunks as documents
             "sources": sources,
+            "sources_truncated": detailed and total_documents > SOURCE_STATS_SCAN_LIMIT,
             "collection_name": collection_stats.get("collection", "travel_instructions"),
             "vector_store_type": collection_stats.get("type", "chroma")
         }
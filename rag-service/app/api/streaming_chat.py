@@ -11,15 +11,16 @@ import uuid
 
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.models.query import ChatRequest, Provider
+from app.models.query import ChatRequest, Provider, Source
 from app.api.chat import get_llm
 from app.pipelines.parallel_retrieval import create_parallel_pipeline
 from app.pipelines.query_optimizer import QueryOptimizer
-from app.services.advanced_cache import AdvancedCacheService, create_context_hash
+from app.services.advanced_cache import get_advanced_cache_service, create_context_hash
+from app.services.cache import json_dumps
 from app.services.performance_monitor import get_performance_monitor
 from app.api.streaming import StreamingCallbackHandler, RetrievalStreamingHandler
 from app.components.result_processor import StreamingResultProcessor
-from app.services.llm_pool import llm_pool
+from app.services.llm_pool import get_llm_pool
 
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.callbacks import AsyncCallbackManager
@@ -126,7 +127,7 @@ async def generate_sse_events(
     
     try:
         # Yield connection established event
-        yield f"data: {json.dumps({'type': 'connection', 'id': connection_id})}\n\n"
+        yield f"data: {json_dumps({'type': 'connection', 'id': connection_id})}\n\n"
         
         # Get services from app state
         app = request.app
@@ -159,7 +160,7 @@ async def generate_sse_events(
         
         try:
             # Use async context manager pattern
-            async with llm_pool.acquire(provider_enum, chat_request.model or "gpt-4") as llm_wrapper:
+            async with get_llm_pool().acquire(provider_enum, chat_request.model or "gpt-4") as llm_wrapper:
                 from_pool = True
                 logger.info(f"Acquired LLM from pool: {provider_enum.value}:{chat_request.model}")
                 
@@ -195,10 +196,8 @@ async def generate_sse_events(
                 # Initialize result processor for streaming
                 result_processor = StreamingResultProcessor()
                 
-                # Advanced cache initialization
-                advanced_cache = None
-                if cache_service:
-                    advanced_cache = AdvancedCacheService(cache_service)
+                # Process-wide advanced cache, if the cache is available
+                advanced_cache = get_advanced_cache_service() if cache_service else None
                 
                 # Only create retrieval pipeline if RAG is enabled
                 retrieval_pipeline = None
@@ -208,7 +207,7 @@ async def generate_sse_events(
                 
                 if chat_request.use_rag:
                     # Yield retrieval start event
-                    yield f"data: {json.dumps({'type': 'retrieval_start'})}\n\n"
+                    yield f"data: {json_dumps({'type': 'retrieval_start'})}\n\n"
                     
                     # Check cache first
                     cached_response = None
@@ -226,26 +225,26 @@ async def generate_sse_events(
                     
                     if cached_response:
                         # Stream cached response
-                        yield f"data: {json.dumps({'type': 'cache_hit', 'level': 'l3'})}\n\n"
+                        yield f"data: {json_dumps({'type': 'cache_hit', 'level': 'l3'})}\n\n"
                         
                         # Split cached response into tokens for streaming effect
                         tokens = cached_response.get("response", "").split()
                         for i, token in enumerate(tokens):
                             if i == 0 and first_token_time is None:
                                 first_token_time = datetime.utcnow()
-                            yield f"data: {json.dumps({'type': 'token', 'content': token + ' '})}\n\n"
+                            yield f"data: {json_dumps({'type': 'token', 'content': token + ' '})}\n\n"
                             await asyncio.sleep(0.01)  # Small delay for streaming effect
                         
                         # Send sources if available
                         if cached_response.get("sources"):
-                            yield f"data: {json.dumps({'type': 'sources', 'sources': cached_response['sources']})}\n\n"
+                            yield f"data: {json_dumps({'type': 'sources', 'sources': cached_response['sources']})}\n\n"
                         
                         # Send follow-up questions if available
                         if cached_response.get("follow_up_questions"):
-                            yield f"data: {json.dumps({'type': 'metadata', 'follow_up_questions': cached_response['follow_up_questions']})}\n\n"
+                            yield f"data: {json_dumps({'type': 'metadata', 'follow_up_questions': cached_response['follow_up_questions']})}\n\n"
                         
                         # Complete event
-                        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+                        yield f"data: {json_dumps({'type': 'complete'})}\n\n"
                         return
                     
                     # Query optimization (use rule-based only for speed)
@@ -279,7 +278,7 @@ async def generate_sse_events(
                     )
                     
                     retrieval_time = time.time() - retrieval_start
-                    yield f"data: {json.dumps({'type': 'retrieval_complete', 'duration': retrieval_time, 'count': len(results)})}\n\n"
+                    yield f"data: {json_dumps({'type': 'retrieval_complete', 'duration': retrieval_time, 'count': len(results)})}\n\n"
                     
                     # Process results for streaming
                     if results:
@@ -308,8 +307,6 @@ async def generate_sse_events(
                                 context_parts.append(f"[Source {i+1}]\n{doc.page_content}\n")
                             
                             # Create source object
-                            from app.models.query import Source
-                            
                             # Handle different metadata field names
                             url = doc.metadata.get("source") or doc.metadata.get("url") or doc.metadata.get("file_path", "Unknown")
                             title = doc.metadata.get("title") or doc.metadata.get("filename") or url
@@ -324,12 +321,12 @@ async def generate_sse_events(
                                 score=score,
                                 metadata=doc.metadata
                             )
-                            sources.append(source.dict())
+                            sources.append(source.model_dump())
                         
                         context = "\n".join(context_parts)
                         
                         # Send sources event
-                        yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
+                        yield f"data: {json_dumps({'type': 'sources', 'sources': sources})}\n\n"
                 
                 # Build messages
                 system_prompt = """You are a helpful assistant for Canadian Forces members seeking information about travel instructions and policies.
@@ -385,7 +382,7 @@ User Question: {chat_request.message}"""
                     messages.append(HumanMessage(content=chat_request.message))
                 
                 # Yield generation start event
-                yield f"data: {json.dumps({'type': 'generation_start'})}\n\n"
+                yield f"data: {json_dumps({'type': 'generation_start'})}\n\n"
                 
                 # Stream the response
                 token_count = 0
@@ -419,10 +416,10 @@ User Question: {chat_request.message}"""
                             first_token_time = datetime.utcnow()
                             first_token_latency = (first_token_time - start_time).total_seconds() * 1000
                             perf_monitor.record_latency("first_token_latency_ms", first_token_latency)
-                            yield f"data: {json.dumps({'type': 'first_token', 'latency': first_token_latency})}\n\n"
+                            yield f"data: {json_dumps({'type': 'first_token', 'latency': first_token_latency})}\n\n"
                         
                         # Send token
-                        yield f"data: {json.dumps({'type': 'token', 'content': content})}\n\n"
+                        yield f"data: {json_dumps({'type': 'token', 'content': content})}\n\n"
                         full_response += content
                         token_count += 1
                         
@@ -443,7 +440,7 @@ User Question: {chat_request.message}"""
                     
                     # Send metadata event with follow-up questions if any were generated
                     if follow_up_questions:
-                        yield f"data: {json.dumps({'type': 'metadata', 'follow_up_questions': follow_up_questions})}\n\n"
+                        yield f"data: {json_dumps({'type': 'metadata', 'follow_up_questions': follow_up_questions})}\n\n"
                 
                 # Calculate final metrics
                 total_time = (datetime.utcnow() - start_time).total_seconds()
@@ -470,7 +467,7 @@ User Question: {chat_request.message}"""
                     )
                 
                 # Send completion event
-                yield f"data: {json.dumps({'type': 'complete', 'duration': total_time, 'tokens': token_count})}\n\n"
+                yield f"data: {json_dumps({'type': 'complete', 'duration': total_time, 'tokens': token_count})}\n\n"
                 
         except Exception as pool_error:
             logger.warning(f"Failed to acquire from pool: {pool_error}. Creating new instance.")
@@ -505,10 +502,8 @@ User Question: {chat_request.message}"""
             # Initialize result processor for streaming
             result_processor = StreamingResultProcessor()
             
-            # Advanced cache initialization
-            advanced_cache = None
-            if cache_service:
-                advanced_cache = AdvancedCacheService(cache_service)
+            # Process-wide advanced cache, if the cache is available
+            advanced_cache = get_advanced_cache_service() if cache_service else None
             
             # Only create retrieval pipeline if RAG is enabled
             retrieval_pipeline = None
@@ -518,7 +513,7 @@ User Question: {chat_request.message}"""
             
             if chat_request.use_rag:
                 # Yield retrieval start event
-                yield f"data: {json.dumps({'type': 'retrieval_start'})}\n\n"
+                yield f"data: {json_dumps({'type': 'retrieval_start'})}\n\n"
                 
                 # Check cache first
                 cached_response = None
@@ -536,26 +531,26 @@ User Question: {chat_request.message}"""
                 
                 if cached_response:
                     # Stream cached response
-                    yield f"data: {json.dumps({'type': 'cache_hit', 'level': 'l3'})}\n\n"
+                    yield f"data: {json_dumps({'type': 'cache_hit', 'level': 'l3'})}\n\n"
                     
                     # Split cached response into tokens for streaming effect
                     tokens = cached_response.get("response", "").split()
                     for i, token in enumerate(tokens):
                         if i == 0 and first_token_time is None:
                             first_token_time = datetime.utcnow()
-                        yield f"data: {json.dumps({'type': 'token', 'content': token + ' '})}\n\n"
+                        yield f"data: {json_dumps({'type': 'token', 'content': token + ' '})}\n\n"
                         await asyncio.sleep(0.01)  # Small delay for streaming effect
                     
                     # Send sources if available
                     if cached_response.get("sources"):
-                        yield f"data: {json.dumps({'type': 'sources', 'sources': cached_response['sources']})}\n\n"
+                        yield f"data: {json_dumps({'type': 'sources', 'sources': cached_response['sources']})}\n\n"
                     
                     # Send follow-up questions if available
                     if cached_response.get("follow_up_questions"):
-                        yield f"data: {json.dumps({'type': 'metadata', 'follow_up_questions': cached_response['follow_up_questions']})}\n\n"
+                        yield f"data: {json_dumps({'type': 'metadata', 'follow_up_questions': cached_response['follow_up_questions']})}\n\n"
                     
                     # Complete event
-                    yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+                    yield f"data: {json_dumps({'type': 'complete'})}\n\n"
                     return
                 
                 # Query optimization (use rule-based only for speed)
@@ -589,7 +584,7 @@ User Question: {chat_request.message}"""
                 )
                 
                 retrieval_time = time.time() - retrieval_start
-                yield f"data: {json.dumps({'type': 'retrieval_complete', 'duration': retrieval_time, 'count': len(results)})}\n\n"
+                yield f"data: {json_dumps({'type': 'retrieval_complete', 'duration': retrieval_time, 'count': len(results)})}\n\n"
                 
                 # Process results for streaming
                 if results:
@@ -618,8 +613,6 @@ User Question: {chat_request.message}"""
                             context_parts.append(f"[Source {i+1}]\n{doc.page_content}\n")
                         
                         # Create source object
-                        from app.models.query import Source
-                        
                         # Handle different metadata field names
                         url = doc.metadata.get("source") or doc.metadata.get("url") or doc.metadata.get("file_path", "Unknown")
                         title = doc.metadata.get("title") or doc.metadata.get("filename") or url
@@ -634,12 +627,12 @@ User Question: {chat_request.message}"""
                             score=score,
                             metadata=doc.metadata
                         )
-                        sources.append(source.dict())
+                        sources.append(source.model_dump())
                     
                     context = "\n".join(context_parts)
                     
                     # Send sources event
-                    yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
+                    yield f"data: {json_dumps({'type': 'sources', 'sources': sources})}\n\n"
             
             # Build messages
             system_prompt = """You are a helpful assistant for Canadian Forces members seeking information about travel instructions and policies.
@@ -695,7 +688,7 @@ User Question: {chat_request.message}"""
                 messages.append(HumanMessage(content=chat_request.message))
             
             # Yield generation start event
-            yield f"data: {json.dumps({'type': 'generation_start'})}\n\n"
+            yield f"data: {json_dumps({'type': 'generation_start'})}\n\n"
             
             # Stream the response
             token_count = 0
@@ -716,10 +709,10 @@ User Question: {chat_request.message}"""
                         first_token_time = datetime.utcnow()
                         first_token_latency = (first_token_time - start_time).total_seconds() * 1000
                         perf_monitor.record_latency("first_token_latency_ms", first_token_latency)
-                        yield f"data: {json.dumps({'type': 'first_token', 'latency': first_token_latency})}\n\n"
+                        yield f"data: {json_dumps({'type': 'first_token', 'latency': first_token_latency})}\n\n"
                     
                     # Send token
-                    yield f"data: {json.dumps({'type': 'token', 'content': content})}\n\n"
+                    yield f"data: {json_dumps({'type': 'token', 'content': content})}\n\n"
                     full_response += content
                     token_count += 1
                     
@@ -740,7 +733,7 @@ User Question: {chat_request.message}"""
                 
                 # Send metadata event with follow-up questions if any were generated
                 if follow_up_questions:
-                    yield f"data: {json.dumps({'type': 'metadata', 'follow_up_questions': follow_up_questions})}\n\n"
+                    yield f"data: {json_dumps({'type': 'metadata', 'follow_up_questions': follow_up_questions})}\n\n"
             
             # Calculate final metrics
             total_time = (datetime.utcnow() - start_time).total_seconds()
@@ -767,12 +760,12 @@ User Question: {chat_request.message}"""
                 )
             
             # Send completion event
-            yield f"data: {json.dumps({'type': 'complete', 'duration': total_time, 'tokens': token_count})}\n\n"
+            yield f"data: {json_dumps({'type': 'complete', 'duration': total_time, 'tokens': token_count})}\n\n"
         
     except asyncio.CancelledError:
         # Client disconnected
         logger.info(f"Streaming connection {connection_id} cancelled by client")
-        yield f"data: {json.dumps({'type': 'error', 'message': 'Connection cancelled'})}\n\n"
+        yield f"data: {json_dumps({'type': 'error', 'message': 'Connection cancelled'})}\n\n"
         raise
         
     except Exception as e:
@@ -787,7 +780,7 @@ User Question: {chat_request.message}"""
         else:
             error_type = "unknown_error"
         
-        yield f"data: {json.dumps({'type': 'error', 'error_type': error_type, 'message': error_message})}\n\n"
+        yield f"data: {json_dumps({'type': 'error', 'error_type': error_type, 'message': error_message})}\n\n"
         
     finally:
         # Connection cleanup is handled automatically by the async context manager
@@ -826,9 +819,9 @@ async def test_streaming():
     """Test endpoint for streaming functionality."""
     async def generate():
         for i in range(10):
-            yield f"data: {json.dumps({'type': 'test', 'count': i})}\n\n"
+            yield f"data: {json_dumps({'type': 'test', 'count': i})}\n\n"
             await asyncio.sleep(0.5)
-        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+        yield f"data: {json_dumps({'type': 'complete'})}\n\n"
     
     return StreamingResponse(
         generate(),
@@ -194,6 +194,11 @@ async def get_active_connections():
 class IngestionProgressTracker:
     """Tracks progress of ingestion tasks."""
     
+    # Seconds a finished task is kept before it is dropped
+    COMPLETED_TASK_TTL = 60
+    # Tasks never completed (e.g. their request died) are swept after this
+    STALE_TASK_TTL = 24 * 3600
+    
     def __init__(self, connection_manager: ConnectionManager):
         """Initialize progress tracker."""
         self.manager = connection_manager
@@ -207,6 +212,7 @@ class IngestionProgressTracker:
         task_type: str = "ingestion"
     ):
         """Start tracking a new task."""
+        self._sweep_stale_tasks()
         self.tasks[task_id] = {
             "client_id": client_id,
             "task_type": task_type,
@@ -302,9 +308,24 @@ class IngestionProgressTracker:
             }
         )
         
-        # Clean up completed task after a delay
-        await asyncio.sleep(60)  # Keep for 1 minute
-        if task_id in self.tasks:
+        # Drop the finished task later without holding up the caller
+        asyncio.get_running_loop().call_later(
+            self.COMPLETED_TASK_TTL, self._forget_task, task_id, task
+        )
+        
+    def _forget_task(self, task_id: str, task: Dict[str, Any]):
+        """Drop a finished task unless its id has since been reused by a new one."""
+        if self.tasks.get(task_id) is task:
+            del self.tasks[task_id]
+            
+    def _sweep_stale_tasks(self):
+        """Forget tasks that started too long ago to still be running."""
+        now = datetime.utcnow()
+        stale = [
+            task_id for task_id, task in self.tasks.items()
+            if (now - task["started_at"]).total_seconds() > self.STALE_TASK_TTL
+        ]
+        for task_id in stale:
             del self.tasks[task_id]
 
 
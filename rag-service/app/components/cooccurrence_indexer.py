@@ -5,6 +5,8 @@ This indexer builds a graph of co-occurring terms within proximity windows,
 treating all content uniformly regardless of structure (tables, text, JSON, etc).
 """
 
+import heapq
+import os
 import re
 import pickle
 from typing import Dict, List, Tuple, Set, Optional
@@ -22,11 +24,21 @@ logger = get_logger(__name__)
 class CooccurrenceEdge:
     """Represents an edge between two terms with distance information."""
     
+    # One instance per term pair; slots keep the graph free of per-edge dicts
+    __slots__ = ("distances", "documents", "contexts")
+    
     def __init__(self):
         self.distances: Dict[int, int] = defaultdict(int)  # distance -> count
         self.documents: Set[str] = set()  # document IDs containing this edge
         self.contexts: List[Tuple[str, str]] = []  # (doc_id, surrounding_text) samples
         
+    def __setstate__(self, state):
+        """Restore from a pickle, including indexes saved before __slots__."""
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            setattr(self, name, value)
+            
     def add_occurrence(self, distance: int, doc_id: str, context: str = ""):
         """Add an occurrence of this edge."""
         self.distances[distance] += 1
@@ -66,6 +78,9 @@ class CooccurrenceEdge:
 class CooccurrenceIndexer:
     """Indexes content based on term co-occurrence within proximity windows."""
     
+    # Whole index is stored as one pickle so shared tokens are written once
+    INDEX_FILE = "cooccurrence_index.pkl"
+    
     def __init__(self, 
                  window_sizes: List[int] = None,
                  min_token_length: int = 2,
@@ -112,9 +127,7 @@ class CooccurrenceIndexer:
         
         # Store token positions
         for i, token in enumerate(tokens):
-            if doc_id not in self.token_positions[token]:
-                self.token_positions[token][doc_id] = []
-            self.token_positions[token][doc_id].append(i)
+            self.token_positions[token].setdefault(doc_id, []).append(i)
         
         # Build co-occurrence edges for different window sizes
         for window_size in self.window_sizes:
@@ -124,7 +137,9 @@ class CooccurrenceIndexer:
         
     def _index_cooccurrences(self, doc_id: str, tokens: List[str], window_size: int):
         """Index co-occurrences within a specific window size."""
+        graph = self.cooccurrence_graph
         for i, token1 in enumerate(tokens):
+            edges1 = graph[token1]
             # Look ahead within window
             for j in range(i + 1, min(i + window_size + 1, len(tokens))):
                 token2 = tokens[j]
@@ -139,15 +154,18 @@ class CooccurrenceIndexer:
                 context_end = min(len(tokens), j + 3)
                 context = " ".join(tokens[context_start:context_end])
                 
-                # Add edge token1 -> token2
-                if token2 not in self.cooccurrence_graph[token1]:
-                    self.cooccurrence_graph[token1][token2] = CooccurrenceEdge()
-                self.cooccurrence_graph[token1][token2].add_occurrence(distance, doc_id, context)
+                # Add edge token1 -> token2 (one lookup when the edge exists)
+                edge = edges1.get(token2)
+                if edge is None:
+                    edge = edges1[token2] = CooccurrenceEdge()
+                edge.add_occurrence(distance, doc_id, context)
                 
                 # Add edge token2 -> token1
-                if token1 not in self.cooccurrence_graph[token2]:
-                    self.cooccurrence_graph[token2][token1] = CooccurrenceEdge()
-                self.cooccurrence_graph[token2][token1].add_occurrence(distance, doc_id, context)
+                edges2 = graph[token2]
+                edge = edges2.get(token1)
+                if edge is None:
+                    edge = edges2[token1] = CooccurrenceEdge()
+                edge.add_occurrence(distance, doc_id, context)
                 
     def find_connecting_content(self, query_terms: List[str], top_k: int = 10) -> List[Tuple[str, float, Dict]]:
         """
@@ -184,11 +202,11 @@ class CooccurrenceIndexer:
             if score > 0:
                 doc_scores.append((doc_id, score, details))
                 
-        # Sort by score and return top k
-        doc_scores.sort(key=lambda x: x[1], reverse=True)
+        # Select the top k without sorting every candidate
+        top_scores = heapq.nlargest(top_k, doc_scores, key=lambda x: x[1])
         
         results = []
-        for doc_id, score, details in doc_scores[:top_k]:
+        for doc_id, score, details in top_scores:
             results.append((
                 doc_id,
                 score,
@@ -300,38 +318,44 @@ class CooccurrenceIndexer:
         """Save the index to disk."""
         self.index_path.mkdir(parents=True, exist_ok=True)
         
-        # Save main graph
-        with open(self.index_path / "cooccurrence_graph.pkl", "wb") as f:
-            pickle.dump(dict(self.cooccurrence_graph), f)
-            
-        # Save auxiliary data
-        with open(self.index_path / "document_tokens.pkl", "wb") as f:
-            pickle.dump(self.document_tokens, f)
-            
-        with open(self.index_path / "token_positions.pkl", "wb") as f:
-            pickle.dump(dict(self.token_positions), f)
-            
-        with open(self.index_path / "document_metadata.pkl", "wb") as f:
-            pickle.dump(self.document_metadata, f)
+        index = {
+            "cooccurrence_graph": dict(self.cooccurrence_graph),
+            "document_tokens": self.document_tokens,
+            "token_positions": dict(self.token_positions),
+            "document_metadata": self.document_metadata,
+        }
+        
+        # Write to a temp file and swap it in so readers never see a partial index
+        index_file = self.index_path / self.INDEX_FILE
+        tmp_file = index_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, index_file)
             
         logger.info(f"Saved co-occurrence index to {self.index_path}")
         
+    def _load_legacy_index(self) -> Dict:
+        """Read an index saved as one pickle file per structure."""
+        index = {}
+        for name in ("cooccurrence_graph", "document_tokens", "token_positions", "document_metadata"):
+            with open(self.index_path / f"{name}.pkl", "rb") as f:
+                index[name] = pickle.load(f)
+        return index
+        
     def load_index(self) -> bool:
         """Load the index from disk."""
         try:
-            # Load main graph
-            with open(self.index_path / "cooccurrence_graph.pkl", "rb") as f:
-                self.cooccurrence_graph = defaultdict(dict, pickle.load(f))
-                
-            # Load auxiliary data
-            with open(self.index_path / "document_tokens.pkl", "rb") as f:
-                self.document_tokens = pickle.load(f)
-                
-            with open(self.index_path / "token_positions.pkl", "rb") as f:
-                self.token_positions = defaultdict(dict, pickle.load(f))
+            index_file = self.index_path / self.INDEX_FILE
+            if index_file.exists():
+                with open(index_file, "rb") as f:
+                    index = pickle.load(f)
+            else:
+                index = self._load_legacy_index()
                 
-            with open(self.index_path / "document_metadata.pkl", "rb") as f:
-                self.document_metadata = pickle.load(f)
+            self.cooccurrence_graph = defaultdict(dict, index["cooccurrence_graph"])
+            self.document_tokens = index["document_tokens"]
+            self.token_positions = defaultdict(dict, index["token_positions"])
+            self.document_metadata = index["document_metadata"]
                 
             logger.info(f"Loaded co-occurrence index from {self.index_path}")
             return True
@@ -6,6 +6,7 @@ to find documents related to concepts that frequently appear together.
 """
 
 from typing import List, Dict, Any, Optional, Set
+import heapq
 import logging
 import json
 import os
@@ -297,9 +298,8 @@ class TravelCooccurrenceRetriever(BaseRetriever, BaseComponent):
                 
                 doc_scores.append((doc, score))
         
-        # Sort by score and return top k
-        doc_scores.sort(key=lambda x: x[1], reverse=True)
-        docs = [doc for doc, score in doc_scores[:self.k]]
+        # Select the top k without sorting every candidate
+        docs = [doc for doc, score in heapq.nlargest(self.k, doc_scores, key=lambda x: x[1])]
         
         # Log retrieval
         self._log_event("retrieve", {
@@ -9,6 +9,7 @@ import asyncio
 from typing import List, Optional, Dict, Any, Union
 import logging
 from functools import lru_cache
+from collections import OrderedDict
 
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseLLM
@@ -107,7 +108,8 @@ class CrossEncoderReranker(BaseComponent):
         self,
         model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
         device: str = "cpu",
-        max_length: int = 512
+        max_length: int = 512,
+        cache_size: int = 10000
     ):
         """
         Initialize cross-encoder reranker.
@@ -116,6 +118,7 @@ class CrossEncoderReranker(BaseComponent):
             model_name: Name of the cross-encoder model
             device: Device to run on (cpu/cuda)
             max_length: Maximum sequence length
+            cache_size: Maximum number of cached query-document scores
         """
         super().__init__(component_type="reranker", component_name="cross_encoder")
         
@@ -127,7 +130,9 @@ class CrossEncoderReranker(BaseComponent):
         
         self.model = CrossEncoder(model_name, device=device, max_length=max_length)
         self.model_name = model_name
-        self._cache = {}
+        # LRU of query-document scores, bounded so long-lived rerankers don't grow forever
+        self._cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size
     
     def _get_cache_key(self, query: str, doc: Document) -> str:
         """Generate cache key for query-document pair."""
@@ -143,32 +148,35 @@ class CrossEncoderReranker(BaseComponent):
         if not documents:
             return []
         
-        # Prepare pairs for scoring
-        pairs = []
-        for doc in documents:
-            cache_key = self._get_cache_key(query, doc)
-            if cache_key in self._cache:
+        # Collect cached scores and the distinct pairs still to score
+        cache_keys = [self._get_cache_key(query, doc) for doc in documents]
+        scores_by_key = {}
+        pending = {}
+        for doc, cache_key in zip(documents, cache_keys):
+            if cache_key in scores_by_key or cache_key in pending:
                 continue
-            pairs.append([query, doc.page_content])
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                scores_by_key[cache_key] = self._cache[cache_key]
+            else:
+                pending[cache_key] = doc.page_content
         
         # Score new pairs
-        if pairs:
-            scores = self.model.predict(pairs)
+        if pending:
+            scores = self.model.predict([[query, content] for content in pending.values()])
             
-            # Cache scores
-            idx = 0
-            for doc in documents:
-                cache_key = self._get_cache_key(query, doc)
-                if cache_key not in self._cache:
-                    self._cache[cache_key] = scores[idx]
-                    idx += 1
+            # Cache scores, evicting the least recently used
+            for cache_key, score in zip(pending, scores):
+                scores_by_key[cache_key] = score
+                self._cache[cache_key] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
         
         # Get all scores
-        doc_scores = []
-        for doc in documents:
-            cache_key = self._get_cache_key(query, doc)
-            score = self._cache.get(cache_key, 0.0)
-            doc_scores.append((doc, score))
+        doc_scores = [
+            (doc, scores_by_key[cache_key])
+            for doc, cache_key in zip(documents, cache_keys)
+        ]
         
         # Sort by score
         doc_scores.sort(key=lambda x: x[1], reverse=True)
@@ -1,14 +1,15 @@
 """Result processing for retrieval results."""
 import re
 import asyncio
+import bisect
 from typing import List, Dict, Any, Optional, Set, Tuple
 from collections import defaultdict
+from functools import lru_cache
 import hashlib
 from datetime import datetime
 
 from langchain_core.documents import Document
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 from app.core.logging import get_logger
@@ -16,6 +17,25 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _term_patterns(query: str) -> Tuple[Tuple["re.Pattern[str]", int], ...]:
+    """Case-insensitive matcher and length for each query term."""
+    return tuple(
+        (re.compile(re.escape(term), re.IGNORECASE), len(term))
+        for term in query.lower().split()
+    )
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(query: str) -> "re.Pattern[str]":
+    """Whole-word alternation over the query terms."""
+    query_terms = set(query.lower().split())
+    return re.compile(
+        r'\b(' + '|'.join(re.escape(term) for term in query_terms) + r')\b',
+        re.IGNORECASE
+    )
+
+
 class ResultProcessor:
     """Process and enhance retrieval results."""
     
@@ -32,7 +52,9 @@ class ResultProcessor:
         self.highlight_query = highlight_query
         self.max_snippet_length = max_snippet_length
         self.snippet_overlap = snippet_overlap
-        self.vectorizer = TfidfVectorizer(max_features=1000)
+        # float32 halves the memory moved through the pairwise similarity pass;
+        # threshold comparisons at 0.8/0.95 do not need float64 precision
+        self.vectorizer = TfidfVectorizer(max_features=1000, dtype=np.float32)
         
     def process_results(
         self,
@@ -98,6 +120,13 @@ class ResultProcessor:
                 
         return filtered
         
+    def _similarity_matrix(self, documents: List[Document]) -> np.ndarray:
+        """Pairwise cosine similarity of the documents' TF-IDF vectors."""
+        vectors = self.vectorizer.fit_transform([doc.page_content for doc in documents])
+        # TF-IDF rows are already L2-normalized, so the Gram matrix is the
+        # cosine similarity; no need to renormalize through sklearn.metrics
+        return (vectors @ vectors.T).toarray()
+        
     def _deduplicate_documents(self, documents: List[Document]) -> List[Document]:
         """Remove duplicate documents based on content similarity."""
         if len(documents) <= 1:
@@ -111,8 +140,7 @@ class ResultProcessor:
             
         # Build TF-IDF vectors for similarity comparison
         try:
-            vectors = self.vectorizer.fit_transform([doc.page_content for doc in documents])
-            similarity_matrix = cosine_similarity(vectors)
+            similarity_matrix = self._similarity_matrix(documents)
         except:
             # Fallback to simple hash-based deduplication
             unique_docs = []
@@ -124,29 +152,27 @@ class ResultProcessor:
             return unique_docs
             
         # Keep track of documents to keep
-        keep_indices = set(range(len(documents)))
+        keep = np.ones(len(documents), dtype=bool)
+        scores = [doc.metadata.get("score", 0) for doc in documents]
         
         for i in range(len(documents)):
-            if i not in keep_indices:
+            if not keep[i]:
                 continue
                 
-            for j in range(i + 1, len(documents)):
-                if j not in keep_indices:
-                    continue
-                    
-                # Check similarity
-                if similarity_matrix[i, j] >= self.deduplication_threshold:
-                    # Keep the document with higher score or more metadata
-                    score_i = documents[i].metadata.get("score", 0)
-                    score_j = documents[j].metadata.get("score", 0)
-                    
-                    if score_i >= score_j:
-                        keep_indices.discard(j)
-                    else:
-                        keep_indices.discard(i)
-                        break
+            # Near-duplicates of i among the later documents still kept
+            similar = np.flatnonzero(
+                keep[i + 1:] & (similarity_matrix[i, i + 1:] >= self.deduplication_threshold)
+            ) + i + 1
+            
+            for j in similar:
+                # Keep the document with higher score or more metadata
+                if scores[i] >= scores[j]:
+                    keep[j] = False
+                else:
+                    keep[i] = False
+                    break
                         
-        return [documents[i] for i in sorted(keep_indices)]
+        return [documents[i] for i in np.flatnonzero(keep)]
         
     def _cluster_documents(self, documents: List[Document]) -> Dict[int, List[int]]:
         """Cluster similar documents together."""
@@ -154,31 +180,28 @@ class ResultProcessor:
             return {0: [0]}
             
         try:
-            # Build TF-IDF vectors
-            vectors = self.vectorizer.fit_transform([doc.page_content for doc in documents])
-            similarity_matrix = cosine_similarity(vectors)
+            # Build TF-IDF similarity matrix
+            similarity_matrix = self._similarity_matrix(documents)
             
             # Simple hierarchical clustering
             clusters = defaultdict(list)
-            assigned = set()
+            unassigned = np.ones(len(documents), dtype=bool)
             cluster_id = 0
             
             for i in range(len(documents)):
-                if i in assigned:
+                if not unassigned[i]:
                     continue
                     
+                # Find similar documents among the later unassigned ones
+                members = np.flatnonzero(
+                    unassigned[i + 1:] & (similarity_matrix[i, i + 1:] >= self.clustering_threshold)
+                ) + i + 1
+                
                 # Start new cluster
                 clusters[cluster_id].append(i)
-                assigned.add(i)
-                
-                # Find similar documents
-                for j in range(i + 1, len(documents)):
-                    if j in assigned:
-                        continue
-                        
-                    if similarity_matrix[i, j] >= self.clustering_threshold:
-                        clusters[cluster_id].append(j)
-                        assigned.add(j)
+                clusters[cluster_id].extend(members.tolist())
+                unassigned[i] = False
+                unassigned[members] = False
                         
                 cluster_id += 1
                 
@@ -196,6 +219,7 @@ class ResultProcessor:
     ) -> List[Document]:
         """Enhance documents with snippets and highlights."""
         enhanced_docs = []
+        processing_timestamp = datetime.utcnow().isoformat()
         
         # Reverse mapping: doc_index -> cluster_id
         doc_to_cluster = {}
@@ -221,7 +245,7 @@ class ResultProcessor:
                 "snippet": snippet,
                 "cluster_id": cluster_id,
                 "cluster_size": cluster_size,
-                "processing_timestamp": datetime.utcnow().isoformat()
+                "processing_timestamp": processing_timestamp
             })
             
             enhanced_doc = Document(
@@ -234,26 +258,40 @@ class ResultProcessor:
         
     def _create_snippet(self, content: str, query: str) -> str:
         """Create a relevant snippet from the content."""
-        # Find query terms in content
-        query_terms = query.lower().split()
-        content_lower = content.lower()
-        
-        # Find best matching position
+        # Index every occurrence of each term once; a term is "near" position i
+        # when an occurrence fits inside content[i-50:i+50]. Terms are matched
+        # case-insensitively against content itself, so no lowered copy is made
+        term_offsets = []
+        candidates = {0}
+        for pattern, term_len in _term_patterns(query):
+            offsets = []
+            match = pattern.search(content)
+            while match:
+                pos = match.start()
+                offsets.append(pos)
+                candidates.add(max(0, pos + term_len - 50))
+                match = pattern.search(content, pos + 1)
+            if offsets:
+                term_offsets.append((offsets, term_len))
+
+        # Scores only increase where some term's window opens, so the first
+        # best position is always one of the candidate offsets
         best_pos = 0
         best_score = 0
-        
-        for i in range(len(content)):
+
+        for i in sorted(candidates):
+            if i >= len(content):
+                break
             score = 0
-            for term in query_terms:
-                # Check if term appears near this position
-                window = content_lower[max(0, i-50):i+50]
-                if term in window:
+            for offsets, term_len in term_offsets:
+                idx = bisect.bisect_left(offsets, i - 50)
+                if idx < len(offsets) and offsets[idx] + term_len <= i + 50:
                     score += 1
-                    
+
             if score > best_score:
                 best_score = score
                 best_pos = i
-                
+
         # Extract snippet around best position
         start = max(0, best_pos - self.max_snippet_length // 2)
         end = min(len(content), start + self.max_snippet_length)
@@ -278,18 +316,8 @@ class ResultProcessor:
         
     def _highlight_terms(self, text: str, query: str) -> str:
         """Highlight query terms in text."""
-        # Split query into terms
-        query_terms = set(query.lower().split())
-        
-        # Create regex pattern for highlighting
-        pattern = r'\b(' + '|'.join(re.escape(term) for term in query_terms) + r')\b'
-        
-        # Replace with highlighted version
-        def replace_func(match):
-            return f"**{match.group(0)}**"
-            
-        highlighted = re.sub(pattern, replace_func, text, flags=re.IGNORECASE)
-        return highlighted
+        # Wrap each whole-word term match; the pattern is compiled once per query
+        return _highlight_pattern(query).sub(r"**\g<0>**", text)
         
     def _format_citations(self, documents: List[Document]) -> List[Document]:
         """Format citations for documents."""
@@ -19,6 +19,13 @@ from pydantic import Field
 logger = logging.getLogger(__name__)
 
 
+# Parsed once at import instead of per summarized table
+TABLE_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert at summarizing tables for search. Create a natural language summary that describes what information this table contains, what values it provides, and what questions it can answer."),
+    ("human", "Table content:\n{table_content}\n\nSection: {section}\n\nCreate a search-optimized summary:")
+])
+
+
 class TableMultiVectorRetriever(BaseRetriever):
     """
     Specialized retriever for tables that:
@@ -56,13 +63,8 @@ class TableMultiVectorRetriever(BaseRetriever):
             return f"Table in section '{section}' containing data with values and rates"
         
         # Use LLM to generate rich summary
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert at summarizing tables for search. Create a natural language summary that describes what information this table contains, what values it provides, and what questions it can answer."),
-            ("human", "Table content:\n{table_content}\n\nSection: {section}\n\nCreate a search-optimized summary:")
-        ])
-        
         try:
-            messages = prompt.format_messages(
+            messages = TABLE_SUMMARY_PROMPT.format_messages(
                 table_content=table_doc.page_content[:1000],  # Limit for context
                 section=table_doc.metadata.get("section", "Unknown")
             )
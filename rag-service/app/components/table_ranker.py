@@ -9,16 +9,37 @@ from app.utils.table_validator import TableValidator
 
 logger = get_logger(__name__)
 
+# Keyword tables are immutable and shared by every ranker instance
+TABLE_CONTENT_TYPES = frozenset({
+    "table_markdown", "table_key_value", "table_json",
+    "table_summary", "table_unstructured", "table_html"
+})
+
+TABLE_INDICATORS = frozenset({
+    "rate", "rates", "limit", "limits", "allowance", "allowances",
+    "maximum", "minimum", "per", "table", "schedule", "appendix",
+    "how much", "what is the", "cost", "price", "amount"
+})
+
+MEAL_INDICATORS = frozenset({
+    "meal", "breakfast", "lunch", "dinner", "food",
+    "per meal", "meal allowance", "meal rate"
+})
+
+# Canadian provinces and territories (ordered: matches are reported in this order)
+PROVINCES = (
+    "ontario", "quebec", "british columbia", "alberta", "manitoba",
+    "saskatchewan", "nova scotia", "new brunswick", "newfoundland",
+    "prince edward island", "northwest territories", "yukon", "nunavut"
+)
+
 
 class TableRanker:
     """Ranks documents with special consideration for table content."""
     
     def __init__(self):
         """Initialize the table ranker."""
-        self.table_content_types = {
-            "table_markdown", "table_key_value", "table_json", 
-            "table_summary", "table_unstructured", "table_html"
-        }
+        self.table_content_types = TABLE_CONTENT_TYPES
         
     def rank_documents(
         self, 
@@ -41,8 +62,13 @@ class TableRanker:
         """
         scored_docs = []
         
+        # Query-only features are identical for every document
+        query_features = self._analyze_query(query, query_type)
+        
         for doc in documents:
-            score = self._calculate_score(doc, query, query_type, value_patterns)
+            score = self._calculate_score(
+                doc, query, query_type, value_patterns, query_features
+            )
             scored_docs.append((doc, score))
         
         # Sort by score descending
@@ -50,22 +76,56 @@ class TableRanker:
         
         return scored_docs
     
+    def _analyze_query(
+        self,
+        query: str,
+        query_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Compute the query-dependent scoring features once.
+        
+        Args:
+            query: Original query
+            query_type: Type of query (e.g., "table", "simple")
+            
+        Returns:
+            Dictionary of query features consumed by _calculate_score
+        """
+        # Lowercase once; every keyword predicate below reuses it
+        query_lower = query.lower()
+        query_terms = query_lower.split()
+        
+        return {
+            "query_terms": query_terms,
+            "query_words": set(query_terms),
+            # An explicit "table" query type skips the keyword scan entirely
+            "is_table_query": query_type == "table" or self._is_table_query(query_lower),
+            "is_meal_query": self._is_meal_query(query_lower),
+            "locations": self._extract_locations(query_lower),
+            "is_numeric_query": self._contains_numeric_query(query),
+        }
+    
     def _calculate_score(
         self,
         doc: Document,
         query: str,
         query_type: Optional[str] = None,
-        value_patterns: Optional[List[str]] = None
+        value_patterns: Optional[List[str]] = None,
+        query_features: Optional[Dict[str, Any]] = None
     ) -> float:
         """Calculate relevance score for a document."""
+        if query_features is None:
+            query_features = self._analyze_query(query, query_type)
+            
         score = 1.0  # Base score
         
         metadata = doc.metadata
         content = doc.page_content.lower()
-        query_lower = query.lower()
+        query_terms = query_features["query_terms"]
+        query_words = query_features["query_words"]
         
         # 1. Boost table documents for table queries
-        if query_type == "table" or self._is_table_query(query):
+        if query_features["is_table_query"]:
             if metadata.get("content_type") in self.table_content_types:
                 score *= 2.0
                 logger.debug(f"Table content boost applied: {metadata.get('content_type')}")
@@ -84,7 +144,7 @@ class TableRanker:
                             logger.debug(f"Key-value exact match: {pattern}")
         
         # Special handling for dollar amounts in meal queries
-        if self._is_meal_query(query) and "$" in content:
+        if query_features["is_meal_query"] and "$" in content:
             # Count dollar signs
             dollar_count = content.count("$")
             if dollar_count > 0:
@@ -100,7 +160,6 @@ class TableRanker:
         # 3. Header matching
         headers = metadata.get("headers", [])
         if headers:
-            query_words = set(query_lower.split())
             header_words = set(" ".join(headers).lower().split())
             
             # Check for header word matches
@@ -110,7 +169,7 @@ class TableRanker:
                 logger.debug(f"Header matches: {header_matches}")
         
         # 4. Location matching
-        locations = self._extract_locations(query)
+        locations = query_features["locations"]
         if locations:
             for location in locations:
                 if location.lower() in content:
@@ -128,7 +187,6 @@ class TableRanker:
         if table_title:
             # Calculate word overlap
             title_words = set(table_title.split())
-            query_words = set(query_lower.split())
             overlap = title_words.intersection(query_words)
             
             if overlap:
@@ -136,7 +194,7 @@ class TableRanker:
                 logger.debug(f"Title word overlap: {overlap}")
         
         # 6. Numeric value extraction and validation
-        if self._contains_numeric_query(query):
+        if query_features["is_numeric_query"]:
             # Check if document contains numeric values
             numeric_values = self._extract_numeric_values(content)
             if numeric_values:
@@ -144,7 +202,6 @@ class TableRanker:
                 logger.debug(f"Document contains {len(numeric_values)} numeric values")
         
         # 7. Query term density
-        query_terms = query_lower.split()
         term_count = sum(1 for term in query_terms if term in content)
         if term_count > 0:
             density_score = min(term_count / len(query_terms), 1.0)
@@ -171,43 +228,20 @@ class TableRanker:
         
         return score
     
-    def _is_table_query(self, query: str) -> bool:
-        """Determine if query is likely seeking table data."""
-        query_lower = query.lower()
-        
-        table_indicators = [
-            "rate", "rates", "limit", "limits", "allowance", "allowances",
-            "maximum", "minimum", "per", "table", "schedule", "appendix",
-            "how much", "what is the", "cost", "price", "amount"
-        ]
-        
-        return any(indicator in query_lower for indicator in table_indicators)
+    def _is_table_query(self, query_lower: str) -> bool:
+        """Determine if an already-lowercased query is likely seeking table data."""
+        return any(indicator in query_lower for indicator in TABLE_INDICATORS)
     
-    def _is_meal_query(self, query: str) -> bool:
-        """Determine if query is about meal allowances."""
-        query_lower = query.lower()
-        
-        meal_indicators = [
-            "meal", "breakfast", "lunch", "dinner", "food",
-            "per meal", "meal allowance", "meal rate"
-        ]
-        
-        return any(indicator in query_lower for indicator in meal_indicators)
+    def _is_meal_query(self, query_lower: str) -> bool:
+        """Determine if an already-lowercased query is about meal allowances."""
+        return any(indicator in query_lower for indicator in MEAL_INDICATORS)
     
-    def _extract_locations(self, query: str) -> List[str]:
-        """Extract location names from query."""
+    def _extract_locations(self, query_lower: str) -> List[str]:
+        """Extract location names from an already-lowercased query."""
         locations = []
-        query_lower = query.lower()
-        
-        # Canadian provinces and territories
-        provinces = [
-            "ontario", "quebec", "british columbia", "alberta", "manitoba",
-            "saskatchewan", "nova scotia", "new brunswick", "newfoundland",
-            "prince edward island", "northwest territories", "yukon", "nunavut"
-        ]
         
         # Check for provinces
-        for province in provinces:
+        for province in PROVINCES:
             if province in query_lower:
                 locations.append(province)
         
@@ -54,6 +54,7 @@ class Settings(BaseSettings):
     embedding_batch_size: int = 20
     max_concurrent_embeddings: int = 30
     vector_store_batch_size: int = 200
+    ingest_concurrency: int = 4  # Documents ingesting at once across all requests
     parallel_retrieval_limit: int = 10  # Maximum concurrent retrieval pipelines
     retriever_timeout: float = 10.0  # Timeout for each retriever in seconds
     
@@ -65,6 +66,10 @@ class Settings(BaseSettings):
     
     # Caching Configuration
     redis_url: Optional[str] = "redis://localhost:6379"
+    redis_max_connections: int = 64
+    redis_binary_max_connections: int = 16  # Pool for packed embedding reads/writes
+    redis_sync_max_connections: int = 8  # Blocking pool for sync cache_result callers
+    redis_pool_timeout: float = 5.0  # Seconds to wait for a free pooled connection
     cache_ttl: int = 3600  # 1 hour
     embedding_cache_ttl: int = 604800  # 1 week
     
@@ -139,14 +139,14 @@ def cache_embedding(ttl: Optional[int] = None):
     """Decorator for caching embedding results."""
     from functools import wraps
     import hashlib
-    import json
+    from app.services.cache import json_dumps, json_loads
     
     def decorator(func):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             # Generate cache key
             key_data = {"args": args, "kwargs": kwargs}
-            key = f"embedding:{hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()}"
+            key = f"embedding:{hashlib.md5(json_dumps(key_data, sort_keys=True).encode()).hexdigest()}"
             
             redis_client = LangChainConfig.get_redis_client()
             if redis_client:
@@ -155,7 +155,7 @@ def cache_embedding(ttl: Optional[int] = None):
                     cached = redis_client.get(key)
                     if cached:
                         logger.debug(f"Cache hit for embedding: {key}")
-                        return json.loads(cached)
+                        return json_loads(cached)
                 except Exception as e:
                     logger.warning(f"Cache get failed: {e}")
             
@@ -166,7 +166,7 @@ def cache_embedding(ttl: Optional[int] = None):
             if redis_client:
                 try:
                     cache_ttl = ttl or settings.embedding_cache_ttl
-                    redis_client.setex(key, cache_ttl, json.dumps(result))
+                    redis_client.setex(key, cache_ttl, json_dumps(result))
                     logger.debug(f"Cached embedding: {key}")
                 except Exception as e:
                     logger.warning(f"Cache set failed: {e}")
@@ -177,7 +177,7 @@ def cache_embedding(ttl: Optional[int] = None):
         def sync_wrapper(*args, **kwargs):
             # Similar logic for sync functions
             key_data = {"args": args, "kwargs": kwargs}
-            key = f"embedding:{hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()}"
+            key = f"embedding:{hashlib.md5(json_dumps(key_data, sort_keys=True).encode()).hexdigest()}"
             
             redis_client = LangChainConfig.get_redis_client()
             if redis_client:
@@ -185,7 +185,7 @@ def cache_embedding(ttl: Optional[int] = None):
                     cached = redis_client.get(key)
                     if cached:
                         logger.debug(f"Cache hit for embedding: {key}")
-                        return json.loads(cached)
+                        return json_loads(cached)
                 except Exception as e:
                     logger.warning(f"Cache get failed: {e}")
             
@@ -194,7 +194,7 @@ def cache_embedding(ttl: Optional[int] = None):
             if redis_client:
                 try:
                     cache_ttl = ttl or settings.embedding_cache_ttl
-                    redis_client.setex(key, cache_ttl, json.dumps(result))
+                    redis_client.setex(key, cache_ttl, json_dumps(result))
                     logger.debug(f"Cached embedding: {key}")
                 except Exception as e:
                     logger.warning(f"Cache set failed: {e}")
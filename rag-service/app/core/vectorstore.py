@@ -1,7 +1,9 @@
 """Vector store management for RAG service."""
 
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import uuid
+import functools
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -18,18 +20,70 @@ from langchain_community.vectorstores.utils import filter_complex_metadata
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.models.documents import Document, DocumentMetadata
+from app.services.cache import json_dumps
 
 logger = get_logger(__name__)
 
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    logger.info("msgpack not available, corpus snapshot kept as Python objects")
+
+
+def _pack_rows(rows: List[Tuple[str, Dict[str, Any]]]) -> Any:
+    """Pack (content, metadata) rows for the in-process corpus snapshot."""
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(rows, use_bin_type=True)
+    return rows
+
+
+def _unpack_rows(packed: Any) -> List[LangchainDocument]:
+    """Fresh documents from a corpus snapshot; callers may mutate them freely."""
+    if MSGPACK_AVAILABLE:
+        rows = msgpack.unpackb(packed, raw=False)
+    else:
+        rows = [(content, dict(metadata)) for content, metadata in packed]
+    return [
+        LangchainDocument(page_content=content, metadata=metadata)
+        for content, metadata in rows
+    ]
+
+
+def _chroma_where(filter_dict: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Chroma where clause for a flat filter; multiple keys are combined with $and."""
+    if filter_dict and len(filter_dict) > 1:
+        return {"$and": [{key: value} for key, value in filter_dict.items()]}
+    return filter_dict or None
+
 
 class VectorStoreManager:
     """Manages vector store operations."""
     
-    def __init__(self):
-        """Initialize vector store manager."""
+    # Redis key holding a token replaced on every write, shared by all workers
+    VERSION_KEY = "vectorstore:version"
+    
+    def __init__(self, redis_client: Optional[Any] = None):
+        """Initialize vector store manager.
+        
+        With a redis_client, writes in any worker process invalidate the
+        version-keyed memos of every worker; without one only this process's
+        own writes are seen.
+        """
         self.embeddings: Optional[Embeddings] = None
         self.vector_store: Optional[VectorStore] = None
         self.executor = ThreadPoolExecutor(max_workers=settings.parallel_embedding_workers)
+        self._redis = redis_client
+        # Bumped on this process's writes; still invalidates its own memos
+        # while Redis is unreachable
+        self._local_version = 0
+        # Filtered match counts, valid for _counts_version only
+        self._counts: Dict[str, int] = {}
+        self._counts_version: Optional[Tuple[Optional[str], int]] = None
+        # (version, packed rows) of the last full-corpus read
+        self._corpus_snapshot: Optional[Tuple[Tuple[Optional[str], int], Any]] = None
+        self._corpus_lock = asyncio.Lock()
         
     async def initialize(self) -> None:
         """Initialize embeddings and vector store."""
@@ -46,6 +100,34 @@ class VectorStoreManager:
             logger.error(f"Failed to initialize vector store: {e}")
             raise
             
+    async def get_version(self) -> Tuple[Optional[str], int]:
+        """Current corpus version; anything memoized at another version is stale.
+        
+        Callers read it once per call, so the cost is one Redis GET.
+        """
+        token = None
+        if self._redis is not None:
+            try:
+                token = await self._redis.get(self.VERSION_KEY)
+                if token is None:
+                    # Missing (first start or a flushed db): start from a fresh
+                    # token so no memo from before the flush can match again
+                    await self._redis.set(self.VERSION_KEY, uuid.uuid4().hex, nx=True)
+                    token = await self._redis.get(self.VERSION_KEY)
+            except Exception as e:
+                logger.warning(f"Failed to read shared vector store version: {e}")
+                token = None
+        return token, self._local_version
+        
+    async def bump_version(self) -> None:
+        """Record a write so every worker drops its version-keyed memos."""
+        self._local_version += 1
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.VERSION_KEY, uuid.uuid4().hex)
+            except Exception as e:
+                logger.warning(f"Failed to publish vector store version: {e}")
+                
     def _create_embeddings(self) -> Embeddings:
         """Create embeddings instance based on configuration."""
         if settings.openai_api_key:
@@ -125,8 +207,9 @@ class VectorStoreManager:
                     batch
                 )
                 all_ids.extend(ids)
+                await self.bump_version()
                 
-                logger.info(f"Added batch {i//batch_size + 1}: {len(batch)} documents")
+                logger.info(f"Added batch {i//actual_batch_size + 1}: {len(batch)} documents")
                 
             return all_ids
             
@@ -134,6 +217,48 @@ class VectorStoreManager:
             logger.error(f"Failed to add documents: {e}")
             raise
             
+    async def add_embedded(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Add one batch of chunks whose embeddings are already computed.
+        
+        Chroma takes the vectors as-is in a single upsert; other stores fall
+        back to add_texts, which re-embeds.
+        """
+        collection = getattr(self.vector_store, "_collection", None)
+        loop = asyncio.get_event_loop()
+        if collection is not None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+            await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    collection.upsert,
+                    ids=ids,
+                    embeddings=[list(e) for e in embeddings],
+                    metadatas=metadatas,
+                    documents=texts
+                )
+            )
+        else:
+            ids = await loop.run_in_executor(
+                self.executor,
+                functools.partial(self.vector_store.add_texts, texts, metadatas=metadatas)
+            )
+        await self.bump_version()
+        return ids
+        
+    def max_write_batch(self) -> int:
+        """Largest upsert the Chroma client accepts in one call (0 if unknown)."""
+        collection = getattr(self.vector_store, "_collection", None)
+        client = getattr(collection, "_client", None)
+        try:
+            return int(getattr(client, "max_batch_size", 0) or 0)
+        except Exception:
+            return 0
+            
     async def search(
         self,
         query: str,
@@ -174,6 +299,145 @@ class VectorStoreManager:
             logger.error(f"Search failed: {e}")
             raise
             
+    async def get_rows_by_filter(
+        self,
+        filter_dict: Optional[Dict[str, Any]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None
+    ) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """Fetch a page of (text, metadata) rows matching a metadata filter.
+        
+        Multiple filter keys are combined with $and. Returns None when the
+        vector store cannot look documents up by metadata alone, so callers
+        can fall back to search().
+        """
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None:
+            return None
+            
+        where = _chroma_where(filter_dict)
+        loop = asyncio.get_event_loop()
+        # Only the text and metadata are pulled back; no query is embedded
+        # and no stored vectors are transferred
+        results = await loop.run_in_executor(
+            self.executor,
+            lambda: collection.get(
+                where=where,
+                limit=limit,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+        )
+        return [
+            (content, metadata or {})
+            for content, metadata in zip(results["documents"], results["metadatas"])
+        ]
+        
+    async def get_by_filter(
+        self,
+        filter_dict: Optional[Dict[str, Any]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None
+    ) -> Optional[List[LangchainDocument]]:
+        """Fetch a page of documents matching a metadata filter, without a query."""
+        rows = await self.get_rows_by_filter(filter_dict, limit=limit, offset=offset)
+        if rows is None:
+            return None
+        return [
+            LangchainDocument(page_content=content, metadata=metadata)
+            for content, metadata in rows
+        ]
+        
+    async def get_all_documents(self) -> Optional[List[LangchainDocument]]:
+        """Every stored chunk's text and metadata, e.g. for building BM25.
+        
+        Rows are kept msgpack-packed until the next write, so later reads
+        skip Chroma's row fetch and decode. Returns None when the vector
+        store cannot enumerate its documents.
+        """
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None:
+            return None
+            
+        loop = asyncio.get_event_loop()
+        version = await self.get_version()
+        snapshot = self._corpus_snapshot
+        if snapshot is None or snapshot[0] != version:
+            # Concurrent callers after a write share a single corpus read
+            async with self._corpus_lock:
+                snapshot = self._corpus_snapshot
+                if snapshot is None or snapshot[0] != version:
+                    results = await loop.run_in_executor(
+                        self.executor,
+                        lambda: collection.get(include=["documents", "metadatas"])
+                    )
+                    rows = [
+                        (content, metadata or {})
+                        for content, metadata in zip(results["documents"], results["metadatas"])
+                    ]
+                    snapshot = self._corpus_snapshot = (version, _pack_rows(rows))
+                    
+
+        return await loop.run_in_executor(self.executor, _unpack_rows, snapshot[1])
+        
+    async def count_by_filter(self, filter_dict: Dict[str, Any]) -> Optional[int]:
+        """Number of documents matching a metadata filter.
+        
+        Counts are memoized until the next write. Returns None when the
+        vector store cannot filter by metadata alone.
+        """
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None:
+            return None
+            
+        version = await self.get_version()
+        if self._counts_version != version:
+            self._counts.clear()
+            self._counts_version = version
+            
+        # Filter values may be lists or operator dicts ($in, ...), so key on
+        # a canonical encoding rather than a tuple of items
+        key = json_dumps(filter_dict, sort_keys=True, default=str)
+        if key not in self._counts:
+            where = _chroma_where(filter_dict)
+            loop = asyncio.get_event_loop()
+            # Chroma has no filtered count; fetching ids alone keeps it cheap
+            results = await loop.run_in_executor(
+                self.executor,
+                lambda: collection.get(where=where, include=[])
+            )
+            self._counts[key] = len(results["ids"])
+        return self._counts[key]
+        
+    async def find_existing_hashes(
+        self,
+        content_hashes: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> Set[str]:
+        """Return which of the given chunk content hashes are already stored.
+        
+        filter_dict narrows the lookup, e.g. to chunks of one parent document.
+        """
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None or not content_hashes:
+            return set()
+            
+        where = _chroma_where({
+            "content_hash": {"$in": list(set(content_hashes))},
+            **(filter_dict or {})
+        })
+        loop = asyncio.get_event_loop()
+        # Metadata-only lookup on the content_hash field; no vectors or text
+        results = await loop.run_in_executor(
+            self.executor,
+            lambda: collection.get(where=where, include=["metadatas"])
+        )
+        return {
+            metadata["content_hash"]
+            for metadata in results["metadatas"]
+            if metadata and metadata.get("content_hash")
+        }
+        
     async def delete_documents(
         self,
         ids: Optional[List[str]] = None,
@@ -189,10 +453,10 @@ class VectorStoreManager:
                     self.vector_store.delete,
                     ids
                 )
+                await self.bump_version()
                 logger.info(f"Deleted {len(ids)} documents")
             elif filter_dict:
-                # Delete by filter - implementation depends on vector store
-                logger.warning("Delete by filter not implemented for all vector stores")
+                await self.delete_by_filter(filter_dict)
                 
             return True
             
@@ -200,6 +464,30 @@ class VectorStoreManager:
             logger.error(f"Failed to delete documents: {e}")
             return False
             
+    async def delete_by_filter(self, filter_dict: Dict[str, Any]) -> int:
+        """Delete every chunk matching a metadata filter, returning the count."""
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None:
+            # Delete by filter - implementation depends on vector store
+            logger.warning("Delete by filter not implemented for all vector stores")
+            return 0
+            
+        where = _chroma_where(filter_dict)
+        
+        def _delete() -> int:
+            # Fetch ids only; no documents, metadata or embeddings leave Chroma
+            ids = collection.get(where=where, include=[])["ids"]
+            if ids:
+                collection.delete(ids=ids)
+            return len(ids)
+            
+        loop = asyncio.get_event_loop()
+        deleted = await loop.run_in_executor(self.executor, _delete)
+        if deleted:
+            await self.bump_version()
+            logger.info(f"Deleted {deleted} documents matching {filter_dict}")
+        return deleted
+            
     def get_retriever(
         self,
         search_kwargs: Optional[Dict[str, Any]] = None
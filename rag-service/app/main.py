@@ -2,7 +2,7 @@
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import time
 import os
@@ -14,7 +14,8 @@ from app.core.langchain_config import LangChainConfig
 from app.api import health, chat, ingestion, sources, websocket, progress, streaming_chat
 from app.services.document_store import DocumentStore
 from app.core.vectorstore import VectorStoreManager
-from app.services.cache import CacheService
+from app.services.cache import CacheService, set_cache_service, ORJSON_AVAILABLE
+from app.services.advanced_cache import AdvancedCacheService, set_advanced_cache_service
 from app.services.llm_pool import initialize_llm_pool, shutdown_llm_pool
 
 # Set up logging
@@ -25,12 +26,13 @@ logger = get_logger(__name__)
 document_store: DocumentStore = None
 vector_store_manager: VectorStoreManager = None
 cache_service: CacheService = None
+advanced_cache: AdvancedCacheService = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
-    global document_store, vector_store_manager, cache_service
+    global document_store, vector_store_manager, cache_service, advanced_cache
     
     logger.info("Starting RAG service...")
     
@@ -43,10 +45,22 @@ async def lifespan(app: FastAPI):
         # Initialize cache service
         cache_service = CacheService()
         await cache_service.connect()
+        set_cache_service(cache_service)
         logger.info("Cache service initialized")
         
+        # One advanced cache per process, so its maintenance loop runs once
+        if cache_service.enabled:
+            advanced_cache = AdvancedCacheService(cache_service)
+            await advanced_cache.initialize()
+            set_advanced_cache_service(advanced_cache)
+            logger.info("Advanced cache service initialized")
+        
         # Initialize vector store
-        vector_store_manager = VectorStoreManager()
+        # Redis carries the store version, so writes in any worker
+        # invalidate the listing/count/BM25 memos of all of them
+        vector_store_manager = VectorStoreManager(
+            cache_service.redis_client if cache_service.enabled else None
+        )
         await vector_store_manager.initialize()
         logger.info("Vector store initialized")
         
@@ -62,6 +76,7 @@ async def lifespan(app: FastAPI):
         app.state.document_store = document_store
         app.state.vector_store_manager = vector_store_manager
         app.state.cache_service = cache_service
+        app.state.advanced_cache = advanced_cache
         
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
@@ -76,6 +91,12 @@ async def lifespan(app: FastAPI):
     await shutdown_llm_pool()
     logger.info("LLM connection pool shut down")
     
+    await progress.close_progress_subscriber()
+    
+    if advanced_cache:
+        await advanced_cache.close()
+        set_advanced_cache_service(None)
+        
     if cache_service:
         await cache_service.disconnect()
     if vector_store_manager:
@@ -93,6 +114,8 @@ app = FastAPI(
     docs_url=f"{settings.api_prefix}/docs",
     redoc_url=f"{settings.api_prefix}/redoc",
     openapi_url=f"{settings.api_prefix}/openapi.json",
+    # Render JSON bodies with orjson when it is installed
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse,
 )
 
 # Add CORS middleware
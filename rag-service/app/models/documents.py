@@ -27,6 +27,7 @@ class DocumentMetadata(BaseModel):
     last_modified: Optional[datetime] = Field(None, description="Last modification date")
     policy_reference: Optional[str] = Field(None, description="Policy reference number")
     tags: List[str] = Field(default_factory=list, description="Document tags")
+    content_hash: Optional[str] = Field(None, description="Normalized content hash for duplicate lookups")
     
     model_config = ConfigDict(use_enum_values=True)
 
@@ -1,11 +1,15 @@
 """Query and chat models for RAG service."""
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
 
+# Chat history is a sliding window: only the most recent messages are kept
+MAX_CHAT_HISTORY = 50
+
+
 class Provider(str, Enum):
     """LLM provider enumeration."""
     OPENAI = "openai"
@@ -47,6 +51,14 @@ class ChatRequest(BaseModel):
     max_tokens: Optional[int] = Field(None, description="Maximum response tokens")
     
     model_config = ConfigDict(use_enum_values=True)
+    
+    @field_validator("chat_history")
+    @classmethod
+    def trim_chat_history(cls, value: Optional[List[ChatMessage]]) -> Optional[List[ChatMessage]]:
+        """Keep only the last MAX_CHAT_HISTORY messages of the conversation."""
+        if value and len(value) > MAX_CHAT_HISTORY:
+            return value[-MAX_CHAT_HISTORY:]
+        return value
 
 
 class ChatResponse(BaseModel):
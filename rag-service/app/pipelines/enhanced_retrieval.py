@@ -20,7 +20,7 @@ from app.components.reranker import CrossEncoderReranker, CohereReranker, LLMRer
 from app.components.result_processor import ResultProcessor
 from app.components.table_query_rewriter import TableQueryRewriter
 from app.components.table_ranker import TableRanker
-from app.services.llm_pool import LLMPool
+from app.services.llm_pool import LLMPool, get_llm_pool
 from app.models.query import Provider
 
 
@@ -68,7 +68,7 @@ class EnhancedRetrievalPipeline:
         self.table_rewriter = table_rewriter
         self.table_ranker = TableRanker()  # Initialize table ranker
         self.cache_service = cache_service
-        self.llm_pool = llm_pool or LLMPool()
+        self.llm_pool = llm_pool or get_llm_pool()
         self.logger = get_logger(__name__)
         
         # Build the workflow graph
@@ -52,9 +52,12 @@ class ImprovedRetrievalPipeline:
         self.use_smart_chunking = use_smart_chunking
         self.use_self_query = use_self_query
         
-        # BM25 state
-        self._bm25_initialized = False
+        # BM25 state; the index is rebuilt whenever the store version moves
+        # past the one it was built at, so new ingestions become searchable
+        self._bm25_version: Optional[Tuple[Optional[str], int]] = None
         self._bm25_retriever = None
+        # Serializes the lazy build so concurrent first queries build it once
+        self._bm25_lock = asyncio.Lock()
         
         # Create retrievers
         self.retrievers = self._create_retrievers()
@@ -114,28 +117,9 @@ class ImprovedRetrievalPipeline:
     async def _get_all_documents(self) -> List[Document]:
         """Get all documents from vector store for BM25 index."""
         try:
-            # Wrap the synchronous operation in asyncio.to_thread
-            def _get_docs_sync():
-                # This is implementation-specific
-                # For Chroma, we can get all documents
-                collection = self.vector_store.vector_store._collection
-                results = collection.get(include=["documents", "metadatas"])
-                
-                if results and results['documents']:
-                    documents = []
-                    for i, content in enumerate(results['documents']):
-                        metadata = results['metadatas'][i] if results['metadatas'] else {}
-                        doc = Document(
-                            page_content=content,
-                            metadata=metadata
-                        )
-                        documents.append(doc)
-                    return documents
-                return []
-            
-            # Run the sync operation in a thread
-            documents = await asyncio.to_thread(_get_docs_sync)
-            return documents
+            # The manager keeps a packed snapshot per corpus version, so
+            # pipelines built per request do not each re-read the collection
+            return await self.vector_store.get_all_documents() or []
             
         except Exception as e:
             logger.error(f"Failed to get all documents: {e}")
@@ -177,8 +161,15 @@ class ImprovedRetrievalPipeline:
         return ensemble_retriever
     
     async def _ensure_bm25_initialized(self):
-        """Ensure BM25 retriever is initialized (lazy loading)."""
-        if not self._bm25_initialized:
+        """Ensure BM25 retriever is built for the current corpus (lazy loading)."""
+        version = await self.vector_store.get_version()
+        if self._bm25_version == version:
+            return
+            
+        async with self._bm25_lock:
+            # Another query may have built it while we waited
+            if self._bm25_version == version:
+                return
             try:
                 # Get all documents from vector store for BM25
                 all_docs = await self._get_all_documents()
@@ -195,12 +186,18 @@ class ImprovedRetrievalPipeline:
                     
                     # Create retriever chain
                     self._create_retriever_chain()
+                elif self._bm25_retriever is not None:
+                    # Corpus emptied (e.g. purged); stop serving the old index
+                    self._bm25_retriever = None
+                    self.retrievers.pop("bm25", None)
+                    self.retrievers["ensemble"] = self._create_ensemble_retriever()
+                    self._create_retriever_chain()
                 
-                self._bm25_initialized = True
+                self._bm25_version = version
                 
             except Exception as e:
                 logger.error(f"Failed to initialize BM25 retriever: {e}")
-                self._bm25_initialized = True  # Prevent retry on every request
+                self._bm25_version = version  # Prevent retry until the next write
     
     def _create_retriever_chain(self):
         """Create the full retriever chain with all components."""
@@ -1,7 +1,7 @@
 """Document ingestion pipeline."""
 
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
 import asyncio
@@ -36,10 +36,19 @@ from app.components.cooccurrence_indexer import CooccurrenceIndexer
 
 logger = get_logger(__name__)
 
+# Pipelines are built per request, so the cap on concurrent ingestions and
+# the locks around the shared on-disk indexes live at module level
+_ingest_semaphore = asyncio.Semaphore(settings.ingest_concurrency)
+_bm25_lock = asyncio.Lock()
+_cooccurrence_lock = asyncio.Lock()
+
 
 class IngestionPipeline:
     """Document ingestion pipeline."""
     
+    # Seconds an in-flight ingestion holds its document's claim in the cache
+    INGEST_CLAIM_TTL = 3600
+    
     def __init__(
         self,
         vector_store_manager: VectorStoreManager,
@@ -91,6 +100,17 @@ class IngestionPipeline:
         progress_callback: Optional[callable] = None
     ) -> DocumentIngestionResponse:
         """Ingest a document through the pipeline."""
+        # Bound concurrent ingestions so bursts of requests cannot exhaust
+        # the embedding provider, the vector store or the worker threads
+        async with _ingest_semaphore:
+            return await self._ingest_document(request, progress_callback)
+            
+    async def _ingest_document(
+        self,
+        request: DocumentIngestionRequest,
+        progress_callback: Optional[callable] = None
+    ) -> DocumentIngestionResponse:
+        """Run one ingestion; callers hold an ingestion slot."""
         start_time = datetime.utcnow()
         
         # Create progress tracker
@@ -99,6 +119,10 @@ class IngestionPipeline:
         if progress_callback:
             progress_tracker.add_callback(progress_callback)
         self.progress_trackers[operation_id] = progress_tracker
+        claim_key = None
+        # Set once the document info replaces the claim; until then any exit,
+        # including cancellation, must release it
+        ingested = False
         
         try:
             # Validate request
@@ -106,13 +130,17 @@ class IngestionPipeline:
             
             # Check if document already exists (unless force refresh)
             if not request.force_refresh:
-                existing = await self._check_existing_document(request)
+                existing, claim_key = await self._check_existing_document(request)
                 if existing:
+                    in_progress = existing.get("status") == "ingesting"
                     return DocumentIngestionResponse(
                         document_id=existing["id"],
                         chunks_created=existing["chunks"],
                         status="exists",
-                        message="Document already ingested",
+                        message=(
+                            "Document ingestion already in progress" if in_progress
+                            else "Document already ingested"
+                        ),
                         processing_time=0
                     )
                     
@@ -158,15 +186,11 @@ class IngestionPipeline:
             regular_docs = []
             
             for doc in deduplicated_docs:
-                # Get metadata dict properly
-                if hasattr(doc.metadata, 'model_dump'):
-                    metadata_dict = doc.metadata.model_dump()
-                elif isinstance(doc.metadata, dict):
-                    metadata_dict = doc.metadata
+                # Only content_type is needed; read it without dumping the model
+                if isinstance(doc.metadata, dict):
+                    content_type = doc.metadata.get("content_type", "")
                 else:
-                    metadata_dict = {}
-                
-                content_type = metadata_dict.get("content_type", "")
+                    content_type = getattr(doc.metadata, "content_type", "")
                 if content_type in ["table_markdown", "table_key_value", "table_html", "table_json", "table_unstructured"]:
                     table_docs.append(doc)
                 else:
@@ -200,15 +224,16 @@ class IngestionPipeline:
                 await progress_tracker.complete_step("storing", f"Stored {len(regular_docs)} documents in {store_time:.2f}s")
                 logger.info(f"Vector store addition completed in {store_time:.2f} seconds")
             
-            # Update BM25 index with new documents
-            await self._update_bm25_index(deduplicated_docs)
-            
-            # Update co-occurrence index with new documents
-            await self._update_cooccurrence_index(deduplicated_docs)
-            
-            # Cache document info
+            # Update the BM25 and co-occurrence indexes and cache the document
+            # info; the three are independent, so they run together
+            post_store = [
+                self._update_bm25_index(deduplicated_docs),
+                self._update_cooccurrence_index(deduplicated_docs)
+            ]
             if self.cache_service:
-                await self._cache_document_info(doc_id, deduplicated_docs, request)
+                post_store.append(self._cache_document_info(doc_id, deduplicated_docs, request))
+            await asyncio.gather(*post_store)
+            ingested = True
                 
             # Calculate processing time
             processing_time = (datetime.utcnow() - start_time).total_seconds()
@@ -268,6 +293,12 @@ class IngestionPipeline:
                 error_details=categorized_error.to_dict()
             )
             
+        finally:
+            if not ingested and claim_key:
+                # CancelledError (client disconnect, shutdown) skips the
+                # handlers above; shield the release from a second cancel
+                await asyncio.shield(self._release_claim(claim_key))
+            
     async def ingest_batch(
         self,
         requests: List[DocumentIngestionRequest],
@@ -445,15 +476,36 @@ class IngestionPipeline:
     async def _check_existing_document(
         self,
         request: DocumentIngestionRequest
-    ) -> Optional[Dict[str, Any]]:
-        """Check if document already exists."""
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Check if document already exists, claiming it for this ingestion if not.
+        
+        SET NX checks and records the document in one round trip, so two
+        concurrent requests for the same document cannot both ingest it.
+        Returns (existing record, claimed cache key).
+        """
         if not self.cache_service:
-            return None
+            return None, None
             
         doc_id = self._generate_document_id(request)
-        cached = await self.cache_service.get(f"doc:{doc_id}")
+        key = f"doc:{doc_id}"
+        claimed = await self.cache_service.set_if_absent(
+            key,
+            {"id": doc_id, "chunks": 0, "status": "ingesting"},
+            ttl=self.INGEST_CLAIM_TTL
+        )
+        
+        if claimed is False:
+            # The holder may have finished or expired in between; the fallback
+            # still reports the document as taken
+            existing = await self.cache_service.get(key)
+            return existing or {"id": doc_id, "chunks": 0, "status": "ingesting"}, None
+            
+        return None, key if claimed else None
         
-        return cached
+    async def _release_claim(self, claim_key: Optional[str]) -> None:
+        """Drop this ingestion's claim so the document can be retried."""
+        if claim_key and self.cache_service:
+            await self.cache_service.delete(claim_key)
         
     def _validate_request(self, request: DocumentIngestionRequest) -> None:
         """Validate ingestion request."""
@@ -619,6 +671,8 @@ class IngestionPipeline:
     ) -> List[Document]:
         """Convert LangChain documents to internal format."""
         internal_docs = []
+        # Chunks of one ingestion share a creation time
+        created_at = datetime.utcnow()
         
         for i, chunk in enumerate(chunks):
             try:
@@ -631,7 +685,8 @@ class IngestionPipeline:
                     page_number=chunk.metadata.get("page"),
                     last_modified=chunk.metadata.get("last_modified"),
                     policy_reference=chunk.metadata.get("policy_reference"),
-                    tags=chunk.metadata.get("tags", [])
+                    tags=chunk.metadata.get("tags", []),
+                    content_hash=self.content_hasher.generate_content_hash(chunk.page_content)
                 )
                 
                 # Create internal document
@@ -641,7 +696,7 @@ class IngestionPipeline:
                     metadata=metadata,
                     chunk_index=i,
                     parent_id=doc_id,
-                    created_at=datetime.utcnow()
+                    created_at=created_at
                 )
                 internal_docs.append(internal_doc)
                 
@@ -683,7 +738,7 @@ class IngestionPipeline:
             # Initialize optimized writer if not already done
             if not self.optimized_writer:
                 self.optimized_writer = OptimizedVectorStoreWriter(
-                    self.vector_store_manager.vector_store,
+                    self.vector_store_manager,
                     self.vector_store_manager.embeddings,
                     progress_tracker=progress_tracker
                 )
@@ -740,6 +795,27 @@ class IngestionPipeline:
             return documents
             
         try:
+            # Drop chunks whose exact content is already stored for this same
+            # document; the hash is a chunk metadata field, so this is one
+            # indexed metadata lookup instead of comparing against every
+            # stored chunk. Matches under other documents are kept, since a
+            # chunk's only copy must belong to the parent that can delete it.
+            existing_hashes = await self.vector_store_manager.find_existing_hashes(
+                [doc.metadata.content_hash for doc in documents if doc.metadata.content_hash],
+                filter_dict={"parent_id": documents[0].metadata.parent_id}
+            )
+            if existing_hashes:
+                before = len(documents)
+                documents = [
+                    doc for doc in documents
+                    if doc.metadata.content_hash not in existing_hashes
+                ]
+                logger.info(
+                    f"Removed {before - len(documents)} chunks already in the vector store"
+                )
+                if not documents:
+                    return documents
+                    
             # Convert documents to format expected by deduplication service
             docs_for_dedup = []
             for doc in documents:
@@ -791,13 +867,11 @@ class IngestionPipeline:
             )
             
             # Convert back to Document objects
+            docs_by_id = {doc.id: doc for doc in reversed(documents)}
             final_docs = []
             for dedup_doc in deduplicated:
                 # Find original document
-                original = next(
-                    (doc for doc in documents if doc.id == dedup_doc["id"]),
-                    None
-                )
+                original = docs_by_id.get(dedup_doc["id"])
                 if original:
                     # Update metadata if it was merged
                     if "metadata" in dedup_doc:
@@ -840,6 +914,12 @@ class IngestionPipeline:
             
     async def _update_bm25_index(self, documents: List[Document]) -> None:
         """Update BM25 index with new documents."""
+        # The rebuild is CPU and disk bound; keep it off the event loop
+        async with _bm25_lock:
+            await asyncio.to_thread(self._update_bm25_index_sync, documents)
+            
+    def _update_bm25_index_sync(self, documents: List[Document]) -> None:
+        """Rebuild the persisted BM25 index with the new documents added."""
         try:
             # Initialize BM25 retriever
             bm25_retriever = TravelBM25Retriever(documents=[])
@@ -886,6 +966,11 @@ class IngestionPipeline:
             
     async def _update_cooccurrence_index(self, documents: List[Document]) -> None:
         """Update co-occurrence index with new documents."""
+        async with _cooccurrence_lock:
+            await asyncio.to_thread(self._update_cooccurrence_index_sync, documents)
+            
+    def _update_cooccurrence_index_sync(self, documents: List[Document]) -> None:
+        """Add the documents to the co-occurrence index and persist it."""
         try:
             # Convert Document objects to LangchainDocument format
             langchain_docs = []
@@ -322,6 +322,7 @@ class LangChainDocumentLoader(BaseComponent):
             # Enhance metadata
             file_name = Path(file_path).name
             file_ext = Path(file_path).suffix.lower()
+            ingestion_timestamp = datetime.utcnow().isoformat()
             
             for doc in documents:
                 if not doc.metadata:
@@ -333,7 +334,7 @@ class LangChainDocumentLoader(BaseComponent):
                     "file_name": file_name,
                     "file_extension": file_ext,
                     "document_type": self._detect_document_type(file_ext),
-                    "ingestion_timestamp": datetime.utcnow().isoformat()
+                    "ingestion_timestamp": ingestion_timestamp
                 })
                 
                 # Extract tables if applicable
@@ -389,6 +390,7 @@ class LangChainDocumentLoader(BaseComponent):
                             doc.page_content = transformed[0].page_content
             
             # Add source metadata
+            ingestion_timestamp = datetime.utcnow().isoformat()
             for doc in documents:
                 if not doc.metadata:
                     doc.metadata = {}
@@ -397,7 +399,7 @@ class LangChainDocumentLoader(BaseComponent):
                     "source_type": "web",
                     "base_url": base_url,
                     "is_government_source": is_gov_site,
-                    "ingestion_timestamp": datetime.utcnow().isoformat()
+                    "ingestion_timestamp": ingestion_timestamp
                 })
                 
             return documents
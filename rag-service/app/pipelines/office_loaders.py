@@ -139,6 +139,7 @@ class XlsxLoader:
         
         # Load workbook
         wb = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        loaded_at = datetime.utcnow().isoformat()
         
         # Process each sheet
         for sheet_name in wb.sheetnames:
@@ -161,7 +162,7 @@ class XlsxLoader:
                         "sheet_name": sheet_name,
                         "sheet_index": wb.sheetnames.index(sheet_name),
                         "total_sheets": len(wb.sheetnames),
-                        "loaded_at": datetime.utcnow().isoformat()
+                        "loaded_at": loaded_at
                     }
                 )
                 documents.append(doc)
@@ -3,7 +3,6 @@
 import asyncio
 from typing import List, Tuple, Optional, Any, Dict
 from concurrent.futures import ThreadPoolExecutor
-import numpy as np
 
 from langchain_core.documents import Document as LangchainDocument
 from langchain_core.embeddings import Embeddings
@@ -211,9 +210,13 @@ class ParallelChunkProcessor:
 class OptimizedVectorStoreWriter:
     """Optimized vector store writer with parallel processing."""
     
-    def __init__(self, vector_store, embeddings: Embeddings, progress_tracker: Optional[IngestionProgressTracker] = None):
-        """Initialize optimized writer."""
-        self.vector_store = vector_store
+    def __init__(self, vector_store_manager, embeddings: Embeddings, progress_tracker: Optional[IngestionProgressTracker] = None):
+        """Initialize optimized writer.
+        
+        Writes go through the VectorStoreManager so its version counter,
+        and every cache keyed on it, sees them.
+        """
+        self.vector_store_manager = vector_store_manager
         self.embeddings = embeddings
         self.embedding_generator = ParallelEmbeddingGenerator(embeddings)
         self.progress_tracker = progress_tracker
@@ -253,9 +256,6 @@ class OptimizedVectorStoreWriter:
             if self.progress_tracker:
                 await self.progress_tracker.complete_step("embedding", f"Generated {len(embeddings)} embeddings")
             
-            # Convert to numpy array for efficient storage
-            embeddings_array = np.array(embeddings)
-            
             # Prepare documents with pre-computed embeddings
             langchain_docs = []
             for i, doc in enumerate(documents):
@@ -284,20 +284,19 @@ class OptimizedVectorStoreWriter:
             if self.progress_tracker:
                 await self.progress_tracker.start_step("storing")
             
-            # Most vector stores don't support pre-computed embeddings directly,
-            # so we'll still batch the addition for efficiency
+            # Vectors are already computed, so the only per-batch cost left is
+            # the store's write transaction; use the largest batch it takes
+            batch_size = max(batch_size, self.vector_store_manager.max_write_batch())
             all_ids = []
-            loop = asyncio.get_event_loop()
             total_docs = len(langchain_docs)
             docs_stored = 0
             
             for i in range(0, len(langchain_docs), batch_size):
                 batch = langchain_docs[i:i + batch_size]
-                # Run synchronous add_documents in executor
-                ids = await loop.run_in_executor(
-                    None,
-                    self.vector_store.add_documents,
-                    batch
+                ids = await self.vector_store_manager.add_embedded(
+                    [doc.page_content for doc in batch],
+                    embeddings[i:i + batch_size],
+                    [doc.metadata for doc in batch]
                 )
                 all_ids.extend(ids)
                 docs_stored += len(batch)
@@ -1,6 +1,7 @@
 """Parallel retrieval pipeline for concurrent retriever execution."""
 
 import asyncio
+import heapq
 from typing import List, Dict, Any, Optional, Tuple, Set
 from datetime import datetime
 import time
@@ -224,9 +225,8 @@ class ParallelRetrievalPipeline:
                     
                     merged_results.append((doc, final_score))
         
-        # Sort by score and return top k
-        merged_results.sort(key=lambda x: x[1], reverse=True)
-        return merged_results[:k]
+        # Select the top k without sorting every result
+        return heapq.nlargest(k, merged_results, key=lambda x: x[1])
     
     def _round_robin_merge(
         self,
@@ -294,9 +294,8 @@ class ParallelRetrievalPipeline:
                     
                     all_results.append((doc, final_score))
         
-        # Sort by score and return top k
-        all_results.sort(key=lambda x: x[1], reverse=True)
-        return all_results[:k]
+        # Select the top k without sorting every result
+        return heapq.nlargest(k, all_results, key=lambda x: x[1])
     
     def get_retriever_stats(self) -> Dict[str, Any]:
         """Get statistics about retriever performance."""
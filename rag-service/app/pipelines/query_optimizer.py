@@ -83,6 +83,12 @@ class QueryOptimizer:
         ]
     }
     
+    # French indicators used for language detection
+    FRENCH_INDICATORS = (
+        "qu'est", "comment", "pourquoi", "quel", "quelle",
+        "combien", "est-ce", "puis-je", "allocation", "taux"
+    )
+    
     def __init__(self, llm: Optional[BaseLLM] = None):
         """Initialize query optimizer."""
         self.llm = llm
@@ -289,17 +295,17 @@ Provide your classification:""",
         
     def detect_language(self, query: str) -> str:
         """Detect query language (basic implementation)."""
-        # French indicators
-        french_words = ["qu'est", "comment", "pourquoi", "quel", "quelle", 
-                       "combien", "est-ce", "puis-je", "allocation", "taux"]
-        
         query_lower = query.lower()
-        french_count = sum(1 for word in french_words if word in query_lower)
         
-        if french_count >= 2:
-            return "fr"
-        else:
-            return "en"
+        # Stop as soon as two indicators match instead of counting them all
+        french_count = 0
+        for word in self.FRENCH_INDICATORS:
+            if word in query_lower:
+                french_count += 1
+                if french_count >= 2:
+                    return "fr"
+                    
+        return "en"
             
     async def optimize_query(self, query: str) -> Dict[str, Any]:
         """Full query optimization pipeline."""
@@ -23,6 +23,22 @@ from app.core.langchain_config import get_embeddings
 
 logger = get_logger(__name__)
 
+# Structure detection patterns, compiled once for all documents
+HEADER_PATTERN = re.compile(r'^#{1,6}\s+.+$', re.MULTILINE)
+TABLE_PATTERNS = [
+    re.compile(r'\|.*\|.*\|'),  # Markdown tables
+    re.compile(r'<table[^>]*>'),  # HTML tables
+    re.compile(r'┌─.*─┐'),  # ASCII tables
+]
+CODE_PATTERNS = [
+    re.compile(r'```[\s\S]*?```'),  # Markdown code blocks
+    re.compile(r'<code>[\s\S]*?</code>'),  # HTML code
+]
+LIST_PATTERNS = [
+    re.compile(r'^\s*[-*+]\s+', re.MULTILINE),  # Unordered lists
+    re.compile(r'^\s*\d+\.\s+', re.MULTILINE),  # Ordered lists
+]
+
 
 class SmartDocumentSplitter:
     """Document-type aware splitting strategy using LangChain splitters."""
@@ -111,39 +127,24 @@ class SmartDocumentSplitter:
         }
         
         # Check for markdown headers
-        header_pattern = r'^#{1,6}\s+.+$'
-        headers = re.findall(header_pattern, text, re.MULTILINE)
+        headers = HEADER_PATTERN.findall(text)
         structure["header_count"] = len(headers)
         structure["has_headers"] = len(headers) > 0
         
-        # Check for tables (markdown or HTML)
-        table_patterns = [
-            r'\|.*\|.*\|',  # Markdown tables
-            r'<table[^>]*>',  # HTML tables
-            r'┌─.*─┐',  # ASCII tables
-        ]
-        for pattern in table_patterns:
-            if re.search(pattern, text):
+        # Check for tables (markdown or HTML); a single findall both detects
+        # and counts, instead of a search followed by a second full scan
+        for pattern in TABLE_PATTERNS:
+            table_count = len(pattern.findall(text))
+            if table_count:
                 structure["has_tables"] = True
-                structure["table_count"] += len(re.findall(pattern, text))
+                structure["table_count"] += table_count
                 
         # Check for code blocks
-        code_patterns = [
-            r'```[\s\S]*?```',  # Markdown code blocks
-            r'<code>[\s\S]*?</code>',  # HTML code
-        ]
-        for pattern in code_patterns:
-            if re.search(pattern, text):
-                structure["has_code"] = True
+        structure["has_code"] = any(pattern.search(text) for pattern in CODE_PATTERNS)
                 
         # Check for lists
-        list_patterns = [
-            r'^\s*[-*+]\s+',  # Unordered lists
-            r'^\s*\d+\.\s+',  # Ordered lists
-        ]
-        for pattern in list_patterns:
-            lists = re.findall(pattern, text, re.MULTILINE)
-            structure["list_count"] += len(lists)
+        for pattern in LIST_PATTERNS:
+            structure["list_count"] += len(pattern.findall(text))
         structure["has_lists"] = structure["list_count"] > 0
         
         # Determine primary type
@@ -263,7 +264,7 @@ class SmartDocumentSplitter:
     ) -> List[Document]:
         """Split technical documents preserving code blocks."""
         # Extract code blocks first
-        code_blocks = re.findall(r'```[\s\S]*?```', document.page_content)
+        code_blocks = CODE_PATTERNS[0].findall(document.page_content)
         
         # Replace code blocks with placeholders
         text_with_placeholders = document.page_content
@@ -389,6 +390,9 @@ class HierarchicalChunker:
             "subsections": []
         }
         
+        # Accumulate lines in a list; repeated str += is quadratic on long sections
+        current_lines = []
+        
         # Simple parsing - can be enhanced
         lines = text.split('\n')
         for line in lines:
@@ -399,6 +403,7 @@ class HierarchicalChunker:
                 title = header_match.group(2)
                 
                 # Save current section if it has content
+                current_section["content"] = "".join(current_lines)
                 if current_section["content"].strip():
                     sections.append(current_section)
                     
@@ -409,10 +414,12 @@ class HierarchicalChunker:
                     "content": "",
                     "subsections": []
                 }
+                current_lines = []
             else:
-                current_section["content"] += line + "\n"
+                current_lines.append(line + "\n")
                 
         # Don't forget the last section
+        current_section["content"] = "".join(current_lines)
         if current_section["content"].strip():
             sections.append(current_section)
             
@@ -28,6 +28,35 @@ from app.components.base import BaseComponent
 
 logger = get_logger(__name__)
 
+# Try to import optional dependencies
+try:
+    import pysbd
+    PYSBD_AVAILABLE = True
+except ImportError:
+    PYSBD_AVAILABLE = False
+    logger.info("pysbd not available, using regex sentence splitting")
+
+# Sentence boundary pattern for proposition extraction
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+
+_sentence_segmenter = None
+
+
+def split_into_sentences(text: str) -> List[str]:
+    """Split text into stripped, non-empty sentences."""
+    global _sentence_segmenter
+
+    if PYSBD_AVAILABLE:
+        # pysbd understands abbreviations and decimals ("approx. 17.30"),
+        # so it produces far fewer spurious fragments than the regex split
+        if _sentence_segmenter is None:
+            _sentence_segmenter = pysbd.Segmenter(language="en", clean=False)
+        sentences = _sentence_segmenter.segment(text)
+    else:
+        sentences = SENTENCE_SPLIT_PATTERN.split(text)
+
+    return [s for s in (sentence.strip() for sentence in sentences) if s]
+
 
 class LangChainTextSplitter(BaseComponent):
     """Main text splitter using LangChain's built-in splitters."""
@@ -267,12 +296,15 @@ class SemanticTextSplitter(TextSplitter):
         
         lines = text.split('\n')
         current_section = {"header": "", "content": ""}
+        # Accumulate lines in a list; repeated str += is quadratic on long sections
+        current_lines = []
         
         for line in lines:
             # Check if line is a header
             match = re.match(header_pattern, line.strip())
             if match and len(line.strip()) < 100:  # Headers are usually short
                 # Save current section if it has content
+                current_section["content"] = "".join(current_lines)
                 if current_section["content"].strip():
                     sections.append(current_section)
                     
@@ -281,11 +313,13 @@ class SemanticTextSplitter(TextSplitter):
                     "header": line.strip(),
                     "content": ""
                 }
+                current_lines = []
             else:
                 # Add to current section
-                current_section["content"] += line + "\n"
+                current_lines.append(line + "\n")
                 
         # Don't forget the last section
+        current_section["content"] = "".join(current_lines)
         if current_section["content"].strip():
             sections.append(current_section)
             
@@ -297,9 +331,11 @@ class SemanticTextSplitter(TextSplitter):
         
     def _split_section(self, text: str) -> List[str]:
         """Split a section into chunks."""
-        # Use recursive splitting with our separators
+        # Use recursive splitting with our separators. Parts are packed into
+        # a list with a running length so each chunk is joined exactly once
         chunks = []
-        current_chunk = ""
+        current_parts = []
+        current_length = 0
         
         for separator in self.separators:
             if separator:
@@ -311,16 +347,19 @@ class SemanticTextSplitter(TextSplitter):
                         part += separator
                         
                     # Check if adding part exceeds chunk size
-                    if len(current_chunk) + len(part) > self.chunk_size:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = part
+                    if current_length + len(part) > self.chunk_size:
+                        if current_length:
+                            chunks.append("".join(current_parts).strip())
+                        current_parts = [part]
+                        current_length = len(part)
                     else:
-                        current_chunk += part
+                        current_parts.append(part)
+                        current_length += len(part)
                         
                 # Update text to be remaining content
-                text = current_chunk
-                current_chunk = ""
+                text = "".join(current_parts)
+                current_parts = []
+                current_length = 0
                 
         # Add any remaining content
         if text.strip():
@@ -479,6 +518,7 @@ def split_documents(
     chunk_overlap = chunk_overlap or settings.chunk_overlap
     
     all_chunks = []
+    chunked_at = datetime.utcnow().isoformat()
     
     for doc in documents:
         # Get document type from metadata
@@ -510,7 +550,7 @@ def split_documents(
                 "chunk_index": i,
                 "chunk_total": len(chunks),
                 "parent_id": doc.metadata.get("id", ""),
-                "chunked_at": datetime.utcnow().isoformat(),
+                "chunked_at": chunked_at,
             })
             
             # Extract section info if available
@@ -531,11 +571,7 @@ def create_propositions(chunk: Document) -> List[Document]:
     propositions = []
     text = chunk.page_content
     
-    # Split into sentences
-    sentences = re.split(r'[.!?]+', text)
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
+    for sentence in split_into_sentences(text):
         if len(sentence) > 20:  # Minimum meaningful length
             # Create proposition document
             prop_doc = Document(
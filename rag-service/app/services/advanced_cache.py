@@ -1,21 +1,202 @@
 """Advanced multi-level caching for the RAG system."""
 
-import json
 import hashlib
-from typing import Optional, Any, Dict, List, Tuple
+import heapq
+from functools import lru_cache
+from typing import Optional, Any, Callable, Dict, List, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import time
+from collections import OrderedDict
 from enum import Enum
 
 import redis.asyncio as redis
+from redis.exceptions import NoScriptError
 import numpy as np
 
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.services.cache import CacheService
+from app.services.cache import CacheService, json_dumps, json_loads
 
 logger = get_logger(__name__)
 
+# Try to import optional dependencies
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    ZSTD_AVAILABLE = False
+    logger.info("zstandard not available, document cache entries stored uncompressed")
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    logger.info("msgpack not available, document cache entries stored as JSON")
+
+# Every zstd frame starts with this magic number; JSON text never does
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Format byte in front of msgpack payloads, leaving room for later formats;
+# like the zstd magic it can never begin a JSON document
+MSGPACK_V1 = b"\x01"
+
+# Document payloads smaller than this are not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+# Payloads larger than this are decoded in a worker thread so decompressing
+# and parsing them does not stall the event loop
+DECODE_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _key_digest(text: str) -> str:
+    """Memoized 128-bit BLAKE2b hex digest for cache keys of repeated queries."""
+    # Keys never leave this service, so a fast non-MD5 digest of the same
+    # width is a drop-in replacement (existing MD5 keys simply age out)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _pack_embedding(embedding: List[float]) -> bytes:
+    """Pack an embedding as little-endian float16 bytes for Redis."""
+    return np.asarray(embedding, dtype="<f2").tobytes()
+
+
+def _unpack_embedding(value: bytes) -> List[float]:
+    """Unpack a float16 embedding written by _pack_embedding."""
+    return np.frombuffer(value, dtype="<f2").astype(np.float32).tolist()
+
+
+def _encode_payload(value: Any) -> bytes:
+    """Serialize a binary cache payload, compressing it with zstd when large."""
+    payload = None
+    if MSGPACK_AVAILABLE:
+        try:
+            payload = MSGPACK_V1 + msgpack.packb(value, use_bin_type=True)
+        except TypeError:
+            # Types msgpack cannot encode fall back to the JSON encoder
+            pass
+    if payload is None:
+        payload = json_dumps(value).encode()
+        
+    if ZSTD_AVAILABLE and len(payload) > COMPRESSION_THRESHOLD:
+        return _zstd_compressor.compress(payload)
+    return payload
+
+
+def _decode_payload(value: bytes) -> Any:
+    """Deserialize a payload written by _encode_payload, in any of its formats.
+    
+    Returns None (a cache miss) for entries written in a format this process
+    cannot read, e.g. by a worker that had zstandard or msgpack installed.
+    """
+    if value.startswith(ZSTD_MAGIC):
+        if not ZSTD_AVAILABLE:
+            return None
+        value = _zstd_decompressor.decompress(value)
+    if value.startswith(MSGPACK_V1):
+        if not MSGPACK_AVAILABLE:
+            return None
+        return msgpack.unpackb(value[1:], raw=False)
+    return json_loads(value)
+
+
+class _LocalLRU:
+    """Small in-process LRU with a per-entry TTL, used as an L0 in front of Redis.
+    
+    Entries are kept in a frozen form (freeze) and every read returns a new
+    object (thaw), so a caller mutating its result or the value it stored
+    cannot change what later readers see.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        freeze: Callable[[Any], Any],
+        thaw: Callable[[Any], Any]
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.freeze = freeze
+        self.thaw = thaw
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return self.thaw(value)
+        
+    def set(self, key: str, value: Any) -> None:
+        try:
+            frozen = self.freeze(value)
+        except (TypeError, ValueError):
+            # Not representable; the Redis layers still serve it
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.monotonic() + self.ttl, frozen)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            
+    def clear(self) -> None:
+        self._data.clear()
+
+
+# The L0 layers live at module level so every AdvancedCacheService in the
+# worker shares them (tests and scripts may build their own). An embedding is
+# a pure function of its (model, text) key, so a local copy can never go
+# stale and is kept for a day; responses need the short TTL for freshness.
+# Embeddings are held as tuples and responses as JSON text.
+_l0_embeddings = _LocalLRU(maxsize=4096, ttl=86400, freeze=tuple, thaw=list)
+_l0_responses = _LocalLRU(maxsize=256, ttl=60, freeze=json_dumps, thaw=json_loads)
+
+
+# Common travel-related queries used for cache warming
+WARMUP_QUERIES = [
+    "meal allowance rates",
+    "kilometric rates",
+    "incidental allowance",
+    "hotel accommodation rates",
+    "travel claim process",
+    "POMV rates",
+    "international travel allowances",
+    "TD travel directive",
+    "relocation benefits",
+    "posting allowances"
+]
+
+
+# Sets a cached value with its TTL scaled by the query's shared frequency, so
+# the adaptive TTL is decided and applied in one round-trip.
+# KEYS: frequency zset, value key. ARGV: query, base TTL, value, NX flag.
+ADAPTIVE_SET_SCRIPT = """
+local frequency = tonumber(redis.call('ZSCORE', KEYS[1], ARGV[1]) or '0')
+local multiplier = 1
+if frequency > 100 then
+    multiplier = 3
+elseif frequency > 50 then
+    multiplier = 2
+elseif frequency > 10 then
+    multiplier = 1.5
+end
+local ttl = math.floor(tonumber(ARGV[2]) * multiplier)
+if ARGV[4] == '1' then
+    return redis.call('SET', KEYS[2], ARGV[3], 'EX', ttl, 'NX')
+end
+return redis.call('SET', KEYS[2], ARGV[3], 'EX', ttl)
+"""
+ADAPTIVE_SET_SHA = hashlib.sha1(ADAPTIVE_SET_SCRIPT.encode()).hexdigest()
+
 
 class CacheLevel(Enum):
     """Cache levels for multi-level caching."""
@@ -42,11 +223,42 @@ class CacheTTL:
 class AdvancedCacheService:
     """Advanced multi-level cache with warming and invalidation."""
     
+    # Seconds between checks for the daily frequency decay
+    FREQUENCY_MAINTENANCE_INTERVAL = 60
+    
+    # Sorted set of normalized query -> hit count, shared by all workers
+    FREQUENCY_KEY = "freq:queries"
+    
+    # Queries kept in the frequency set; the long tail never earns a longer TTL
+    FREQUENCY_MAX_QUERIES = 10000
+    
+    # Scores are halved once a day so stale popularity fades out
+    FREQUENCY_DECAY_KEY = "freq:queries:decay"
+    FREQUENCY_DECAY_INTERVAL = 86400
+    FREQUENCY_DECAY_FACTOR = 0.5
+    
+    # Keys scanned and unlinked per round-trip during invalidation
+    INVALIDATION_BATCH_SIZE = 500
+    
+    # Source indexes outlive the longest adaptive document/response TTL
+    SOURCE_INDEX_TTL = CacheTTL.DOCUMENTS * 3
+    
+    # Seconds to collect a burst of document/response writes into one pipeline
+    WRITE_BATCH_WINDOW = 0.002
+    
+    # Warmup embeddings/retrievals allowed in flight at once
+    WARMUP_CONCURRENCY = 8
+    
+    # Set once ADAPTIVE_SET_SCRIPT is loaded; shared by every per-request instance
+    _adaptive_set_loaded = False
+    
     def __init__(self, base_cache: Optional[CacheService] = None):
         """Initialize advanced cache service."""
         self.base_cache = base_cache or CacheService()
         self._warmup_queries: List[str] = []
-        self._query_frequency: Dict[str, int] = {}
+        self._background_tasks: set = set()
+        self._frequency_maintenance_task: Optional[asyncio.Task] = None
+        self._pending_writes: List[Tuple[str, Any, int, bool, Optional[str], set, asyncio.Future]] = []
         self._cache_stats = {
             "hits": {"l1": 0, "l2": 0, "l3": 0},
             "misses": {"l1": 0, "l2": 0, "l3": 0},
@@ -61,21 +273,29 @@ class AdvancedCacheService:
         # Load warmup queries
         await self._load_warmup_queries()
         
+        if self._frequency_maintenance_task is None:
+            self._frequency_maintenance_task = asyncio.create_task(
+                self._frequency_maintenance_loop()
+            )
+            
+    async def close(self):
+        """Stop background maintenance and any in-flight background writes."""
+        if self._frequency_maintenance_task:
+            self._frequency_maintenance_task.cancel()
+            try:
+                await self._frequency_maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self._frequency_maintenance_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+        # Writes whose flush was cancelled before it took them report failure
+        writes, self._pending_writes = self._pending_writes, []
+        self._resolve_writes(writes, False)
+        
     async def _load_warmup_queries(self):
         """Load common queries for cache warming."""
-        # Common travel-related queries
-        self._warmup_queries = [
-            "meal allowance rates",
-            "kilometric rates",
-            "incidental allowance",
-            "hotel accommodation rates",
-            "travel claim process",
-            "POMV rates",
-            "international travel allowances",
-            "TD travel directive",
-            "relocation benefits",
-            "posting allowances"
-        ]
+        self._warmup_queries = list(WARMUP_QUERIES)
         
     # L1: Embedding Cache
     async def get_embedding(
@@ -86,10 +306,20 @@ class AdvancedCacheService:
         """Get cached embedding (L1 cache)."""
         key = self._make_embedding_key(text, embedding_model)
         
+        value = _l0_embeddings.get(key)
+        if value is not None:
+            self._cache_stats["hits"]["l1"] += 1
+            return value
+            
+        if not self.base_cache.enabled or not self.base_cache.redis_binary:
+            return None
+            
         try:
-            value = await self.base_cache.get(key)
+            value = await self.base_cache.redis_binary.get(key)
             if value:
+                value = _unpack_embedding(value)
                 self._cache_stats["hits"]["l1"] += 1
+                _l0_embeddings.set(key, value)
                 return value
             else:
                 self._cache_stats["misses"]["l1"] += 1
@@ -102,11 +332,25 @@ class AdvancedCacheService:
         self,
         text: str,
         embedding: List[float],
-        embedding_model: str = "default"
+        embedding_model: str = "default",
+        nx: bool = False
     ) -> bool:
-        """Cache embedding (L1 cache)."""
+        """Cache embedding (L1 cache); with nx, never overwrite an existing entry."""
         key = self._make_embedding_key(text, embedding_model)
-        return await self.base_cache.set(key, embedding, CacheTTL.EMBEDDINGS)
+        _l0_embeddings.set(key, embedding)
+        
+        if not self.base_cache.enabled or not self.base_cache.redis_binary:
+            return False
+            
+        try:
+            # SET returns None when NX finds the key already present
+            written = await self.base_cache.redis_binary.set(
+                key, _pack_embedding(embedding), ex=CacheTTL.EMBEDDINGS, nx=nx
+            )
+            return bool(written)
+        except Exception as e:
+            logger.error(f"L1 cache set error: {e}")
+            return False
         
     async def get_embedding_batch(
         self,
@@ -116,24 +360,65 @@ class AdvancedCacheService:
         """Get multiple embeddings from cache."""
         results = {}
         
-        # Use pipeline for efficiency
-        if self.base_cache.redis_client:
-            async with self.base_cache.redis_client.pipeline() as pipe:
-                for text in texts:
-                    key = self._make_embedding_key(text, embedding_model)
-                    pipe.get(key)
-                    
-                values = await pipe.execute()
+        # Serve what the local layer already holds; only the rest hit Redis
+        missing = []
+        for text in texts:
+            key = self._make_embedding_key(text, embedding_model)
+            value = _l0_embeddings.get(key)
+            if value is not None:
+                results[text] = value
+                self._cache_stats["hits"]["l1"] += 1
+            else:
+                missing.append((text, key))
                 
-                for text, value in zip(texts, values):
-                    if value:
-                        results[text] = json.loads(value)
-                        self._cache_stats["hits"]["l1"] += 1
-                    else:
-                        self._cache_stats["misses"]["l1"] += 1
+        if not missing or not self.base_cache.redis_binary:
+            return results
+            
+        try:
+            # A single MGET round-trip instead of N pipelined GETs
+            values = await self.base_cache.redis_binary.mget([key for _, key in missing])
+            
+            for (text, key), value in zip(missing, values):
+                if value:
+                    results[text] = _unpack_embedding(value)
+                    _l0_embeddings.set(key, results[text])
+                    self._cache_stats["hits"]["l1"] += 1
+                else:
+                    self._cache_stats["misses"]["l1"] += 1
+        except Exception as e:
+            logger.error(f"L1 cache batch error: {e}")
                         
         return results
         
+    async def set_embedding_batch(
+        self,
+        embeddings: Dict[str, List[float]],
+        embedding_model: str = "default"
+    ) -> int:
+        """Cache multiple embeddings (L1 cache)."""
+        if not embeddings or not self.base_cache.redis_binary:
+            return 0
+            
+        mapping = {
+            self._make_embedding_key(text, embedding_model): _pack_embedding(embedding)
+            for text, embedding in embeddings.items()
+        }
+        for text, embedding in embeddings.items():
+            _l0_embeddings.set(self._make_embedding_key(text, embedding_model), embedding)
+        
+        try:
+            # Redis has no multi-key SETEX, so send MSET followed by the
+            # per-key EXPIREs in one non-transactional pipeline (one RTT)
+            async with self.base_cache.redis_binary.pipeline(transaction=False) as pipe:
+                pipe.mset(mapping)
+                for key in mapping:
+                    pipe.expire(key, CacheTTL.EMBEDDINGS)
+                await pipe.execute()
+            return len(mapping)
+        except Exception as e:
+            logger.error(f"L1 cache batch set error: {e}")
+            return 0
+        
     # L2: Document Cache
     async def get_documents(
         self,
@@ -144,12 +429,22 @@ class AdvancedCacheService:
         """Get cached documents (L2 cache)."""
         key = self._make_document_key(query, filters, retriever_type)
         
+        if not self.base_cache.enabled or not self.base_cache.redis_binary:
+            return None
+            
         try:
-            value = await self.base_cache.get(key)
-            if value:
+            # Raw bytes: the entry may be zstd-compressed
+            raw = await self.base_cache.redis_binary.get(key)
+            value = None
+            if raw:
+                if len(raw) > DECODE_OFFLOAD_THRESHOLD:
+                    value = await asyncio.to_thread(_decode_payload, raw)
+                else:
+                    value = _decode_payload(raw)
+            if value is not None:
                 self._cache_stats["hits"]["l2"] += 1
-                # Track query frequency
-                await self._track_query_frequency(query)
+                # Track query frequency without holding up the cache hit
+                self._spawn(self._track_query_frequency(query))
                 return value
             else:
                 self._cache_stats["misses"]["l2"] += 1
@@ -163,15 +458,17 @@ class AdvancedCacheService:
         query: str,
         documents: List[Dict[str, Any]],
         filters: Optional[Dict] = None,
-        retriever_type: str = "default"
+        retriever_type: str = "default",
+        nx: bool = False
     ) -> bool:
-        """Cache documents (L2 cache)."""
+        """Cache documents (L2 cache); with nx, never overwrite an existing entry."""
         key = self._make_document_key(query, filters, retriever_type)
         
-        # Determine TTL based on query frequency
-        ttl = await self._get_adaptive_ttl(query, CacheTTL.DOCUMENTS)
-        
-        return await self.base_cache.set(key, documents, ttl)
+        # TTL is scaled by query frequency inside Redis at write time
+        return await self._set_indexed(
+            key, documents, CacheTTL.DOCUMENTS, documents,
+            nx=nx, frequency_query=query.lower().strip(), compress=True
+        )
         
     # L3: Response Cache  
     async def get_response(
@@ -183,10 +480,16 @@ class AdvancedCacheService:
         """Get cached LLM response (L3 cache)."""
         key = self._make_response_key(query, context_hash, model)
         
+        value = _l0_responses.get(key)
+        if value is not None:
+            self._cache_stats["hits"]["l3"] += 1
+            return value
+            
         try:
             value = await self.base_cache.get(key)
             if value:
                 self._cache_stats["hits"]["l3"] += 1
+                _l0_responses.set(key, value)
                 return value
             else:
                 self._cache_stats["misses"]["l3"] += 1
@@ -211,35 +514,89 @@ class AdvancedCacheService:
             # Policy content changes less frequently
             ttl = CacheTTL.RESPONSES * 2
             
-        return await self.base_cache.set(key, response, ttl)
+        _l0_responses.set(key, response)
+        return await self._set_indexed(key, response, ttl, response.get("sources"))
         
     # Cache Warming
     async def warm_cache(self, embeddings_func=None, retrieval_func=None):
         """Warm cache with common queries."""
         logger.info("Starting cache warming...")
         
-        warmed = 0
-        for query in self._warmup_queries:
-            try:
-                # Warm embeddings if function provided
-                if embeddings_func and not await self.get_embedding(query):
-                    embedding = await embeddings_func(query)
-                    if embedding:
-                        await self.set_embedding(query, embedding)
-                        warmed += 1
-                        
-                # Warm documents if function provided
-                if retrieval_func and not await self.get_documents(query):
-                    documents = await retrieval_func(query)
-                    if documents:
-                        await self.set_documents(query, documents)
-                        warmed += 1
-                        
-            except Exception as e:
-                logger.error(f"Error warming cache for query '{query}': {e}")
+        missing_embeddings, missing_documents = await self._find_cold_warmup_queries(
+            check_embeddings=bool(embeddings_func),
+            check_documents=bool(retrieval_func)
+        )
+        
+        # Warm every cold query concurrently, bounded so the embedding API
+        # and retrievers are not flooded
+        semaphore = asyncio.Semaphore(self.WARMUP_CONCURRENCY)
+        tasks = [
+            self._warm_embedding(query, embeddings_func, semaphore)
+            for query in missing_embeddings
+        ] + [
+            self._warm_documents(query, retrieval_func, semaphore)
+            for query in missing_documents
+        ]
                 
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        warmed = sum(1 for result in results if result is True)
+        
         logger.info(f"Cache warming completed. Warmed {warmed} entries.")
         
+    async def _find_cold_warmup_queries(
+        self,
+        check_embeddings: bool,
+        check_documents: bool
+    ) -> Tuple[List[str], List[str]]:
+        """Find warmup queries without cached embeddings/documents in one round-trip."""
+        queries = self._warmup_queries
+        missing_embeddings = list(queries) if check_embeddings else []
+        missing_documents = list(queries) if check_documents else []
+        
+        if not queries or not self.base_cache.redis_client:
+            return missing_embeddings, missing_documents
+            
+        try:
+            async with self.base_cache.redis_client.pipeline(transaction=False) as pipe:
+                for query in missing_embeddings:
+                    pipe.exists(self._make_embedding_key(query, "default"))
+                for query in missing_documents:
+                    pipe.exists(self._make_document_key(query, None, "default"))
+                exists = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error checking warmup entries: {e}")
+            return missing_embeddings, missing_documents
+            
+        embedding_exists = exists[:len(missing_embeddings)]
+        document_exists = exists[len(missing_embeddings):]
+        return (
+            [q for q, found in zip(missing_embeddings, embedding_exists) if not found],
+            [q for q, found in zip(missing_documents, document_exists) if not found]
+        )
+        
+    async def _warm_embedding(self, query: str, embeddings_func, semaphore: asyncio.Semaphore) -> bool:
+        """Compute and cache the embedding for one cold warmup query."""
+        async with semaphore:
+            try:
+                embedding = await embeddings_func(query)
+                if embedding:
+                    # NX: another worker warming concurrently may have won
+                    return await self.set_embedding(query, embedding, nx=True)
+            except Exception as e:
+                logger.error(f"Error warming embedding for query '{query}': {e}")
+            return False
+            
+    async def _warm_documents(self, query: str, retrieval_func, semaphore: asyncio.Semaphore) -> bool:
+        """Retrieve and cache documents for one cold warmup query."""
+        async with semaphore:
+            try:
+                documents = await retrieval_func(query)
+                if documents:
+                    return await self.set_documents(query, documents, nx=True)
+            except Exception as e:
+                logger.error(f"Error warming documents for query '{query}': {e}")
+            return False
+        
     # Cache Invalidation
     async def invalidate_pattern(self, pattern: str) -> int:
         """Invalidate cache entries matching pattern."""
@@ -247,17 +604,23 @@ class AdvancedCacheService:
             return 0
             
         try:
-            # Find all matching keys
-            keys = []
-            async for key in self.base_cache.redis_client.scan_iter(match=pattern):
-                keys.append(key)
-                
-            if keys:
-                deleted = await self.base_cache.redis_client.delete(*keys)
-                self._cache_stats["evictions"] += deleted
-                return deleted
+            # UNLINK in bounded batches so Redis never blocks on one huge DEL
+            deleted = 0
+            batch = []
+            async with self.base_cache.session() as conn:
+                async for key in conn.scan_iter(
+                    match=pattern, count=self.INVALIDATION_BATCH_SIZE
+                ):
+                    batch.append(key)
+                    if len(batch) >= self.INVALIDATION_BATCH_SIZE:
+                        deleted += await conn.unlink(*batch)
+                        batch.clear()
+                        
+                if batch:
+                    deleted += await conn.unlink(*batch)
                 
-            return 0
+            self._cache_stats["evictions"] += deleted
+            return deleted
             
         except Exception as e:
             logger.error(f"Error invalidating pattern {pattern}: {e}")
@@ -265,16 +628,27 @@ class AdvancedCacheService:
             
     async def invalidate_by_source(self, source_id: str):
         """Invalidate cache entries related to a source document."""
-        patterns = [
-            f"*:source:{source_id}:*",
-            f"l2_documents:*{source_id}*",
-            f"l3_responses:*"  # Invalidate all responses when source changes
-        ]
+        if not self.base_cache.redis_client:
+            return 0
+            
+        # Local response copies are not indexed, so drop them all
+        _l0_responses.clear()
         
+        index_key = self._make_source_index_key(source_id)
         total_invalidated = 0
-        for pattern in patterns:
-            invalidated = await self.invalidate_pattern(pattern)
-            total_invalidated += invalidated
+        
+        try:
+            # The reverse index lists exactly the entries built from this
+            # source, so no keyspace scan is needed
+            async with self.base_cache.session() as conn:
+                keys = list(await conn.smembers(index_key))
+                for start in range(0, len(keys), self.INVALIDATION_BATCH_SIZE):
+                    batch = keys[start:start + self.INVALIDATION_BATCH_SIZE]
+                    total_invalidated += await conn.unlink(*batch)
+                await conn.unlink(index_key)
+            self._cache_stats["evictions"] += total_invalidated
+        except Exception as e:
+            logger.error(f"Error invalidating source {source_id}: {e}")
             
         logger.info(f"Invalidated {total_invalidated} cache entries for source {source_id}")
         return total_invalidated
@@ -282,8 +656,10 @@ class AdvancedCacheService:
     # Helper Methods
     def _make_embedding_key(self, text: str, model: str) -> str:
         """Create cache key for embeddings."""
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        return f"{CacheLevel.L1_EMBEDDINGS.value}:{model}:{text_hash}"
+        text_hash = _key_digest(text)
+        # v2 entries are packed float16; the version segment keeps them apart
+        # from older JSON-encoded vectors until those expire
+        return f"{CacheLevel.L1_EMBEDDINGS.value}:v2:{model}:{text_hash}"
         
     def _make_document_key(
         self,
@@ -294,52 +670,169 @@ class AdvancedCacheService:
         """Create cache key for documents."""
         key_parts = [query, retriever_type]
         if filters:
-            key_parts.append(json.dumps(filters, sort_keys=True))
+            key_parts.append(json_dumps(filters, sort_keys=True))
             
         key_content = "|".join(key_parts)
-        key_hash = hashlib.md5(key_content.encode()).hexdigest()
+        key_hash = _key_digest(key_content)
         return f"{CacheLevel.L2_DOCUMENTS.value}:{key_hash}"
         
     def _make_response_key(self, query: str, context_hash: str, model: str) -> str:
         """Create cache key for responses."""
-        query_hash = hashlib.md5(query.encode()).hexdigest()
+        query_hash = _key_digest(query)
         return f"{CacheLevel.L3_RESPONSES.value}:{model}:{query_hash}:{context_hash}"
         
+    def _make_source_index_key(self, source_id: str) -> str:
+        """Create key for the set of cache entries built from a source."""
+        return f"idx:source:{source_id}"
+        
+    async def _set_indexed(
+        self,
+        key: str,
+        value: Any,
+        ttl: int,
+        items: Optional[List[Dict[str, Any]]],
+        nx: bool = False,
+        frequency_query: Optional[str] = None,
+        compress: bool = False
+    ) -> bool:
+        """Cache a value and record its key under every source it was built from.
+        
+        With frequency_query, ttl is the base TTL and is scaled by that query's
+        shared frequency as the value is written. With compress, the value is
+        stored in the binary payload format (msgpack, zstd-compressed when
+        large) and must be read back with _decode_payload.
+        """
+        if not self.base_cache.enabled or not self.base_cache.redis_client:
+            return False
+            
+        source_ids = set()
+        for item in items or []:
+            if isinstance(item, dict):
+                metadata = item.get("metadata") or {}
+                source_id = metadata.get("source") or item.get("source") or item.get("url")
+                if source_id:
+                    source_ids.add(str(source_id))
+                    
+        # Queue the write; the first write of a burst schedules one flush
+        # that sends the whole burst in a single pipeline
+        serialized = _encode_payload(value) if compress else json_dumps(value)
+            
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.append(
+            (key, serialized, ttl, nx, frequency_query, source_ids, future)
+        )
+        if len(self._pending_writes) == 1:
+            self._spawn(self._flush_writes())
+        return await future
+        
+    async def _flush_writes(self):
+        """Send every queued write in one round-trip and resolve their futures."""
+        await asyncio.sleep(self.WRITE_BATCH_WINDOW)
+        writes, self._pending_writes = self._pending_writes, []
+        
+        written = False
+        try:
+            if not AdvancedCacheService._adaptive_set_loaded:
+                await self._load_adaptive_set()
+            try:
+                await self._send_writes(writes)
+            except NoScriptError:
+                # Redis restarted or its script cache was flushed
+                await self._load_adaptive_set()
+                await self._send_writes(writes)
+            written = True
+        except Exception as e:
+            logger.error(f"Cache batch set error for {len(writes)} keys: {e}")
+        finally:
+            # Also runs when close() cancels the flush, so no caller hangs
+            self._resolve_writes(writes, written)
+            
+    @staticmethod
+    def _resolve_writes(writes: List[Tuple], written: bool) -> None:
+        """Complete the futures of queued writes that are still awaited."""
+        for *_, future in writes:
+            if not future.done():
+                future.set_result(written)
+                
+    async def _load_adaptive_set(self):
+        """Load ADAPTIVE_SET_SCRIPT into Redis so writes can call it by SHA."""
+        await self.base_cache.redis_client.script_load(ADAPTIVE_SET_SCRIPT)
+        AdvancedCacheService._adaptive_set_loaded = True
+        
+    async def _send_writes(self, writes: List[Tuple]):
+        """Pipeline a batch of queued writes and their source index updates.
+        
+        The script is invoked with plain EVALSHA rather than a registered
+        Script, which would add a SCRIPT EXISTS round-trip to every flush.
+        """
+        async with self.base_cache.redis_client.pipeline(transaction=False) as pipe:
+            for key, serialized, ttl, nx, frequency_query, source_ids, _ in writes:
+                if frequency_query is not None:
+                    pipe.evalsha(
+                        ADAPTIVE_SET_SHA, 2, self.FREQUENCY_KEY, key,
+                        frequency_query, ttl, serialized, int(nx)
+                    )
+                else:
+                    pipe.set(key, serialized, ex=ttl, nx=nx)
+                for source_id in source_ids:
+                    index_key = self._make_source_index_key(source_id)
+                    pipe.sadd(index_key, key)
+                    pipe.expire(index_key, self.SOURCE_INDEX_TTL)
+            await pipe.execute()
+            
+    def _spawn(self, coro) -> None:
+        """Run a fire-and-forget coroutine, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        
     async def _track_query_frequency(self, query: str):
         """Track query frequency for adaptive caching."""
         # Normalize query
         normalized = query.lower().strip()
         
-        # Update in-memory counter
-        self._query_frequency[normalized] = self._query_frequency.get(normalized, 0) + 1
-        
-        # Persist to Redis periodically
+        # Count in the shared sorted set, trimming it to the top queries; the
+        # adaptive TTL script reads its scores from there
         if self.base_cache.redis_client:
-            freq_key = f"query_freq:{hashlib.md5(normalized.encode()).hexdigest()}"
-            await self.base_cache.redis_client.incr(freq_key)
-            await self.base_cache.redis_client.expire(freq_key, 86400 * 30)  # 30 days
+            try:
+                async with self.base_cache.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.zincrby(self.FREQUENCY_KEY, 1, normalized)
+                    pipe.zremrangebyrank(
+                        self.FREQUENCY_KEY, 0, -(self.FREQUENCY_MAX_QUERIES + 1)
+                    )
+                    pipe.expire(self.FREQUENCY_KEY, 86400 * 30)  # 30 days
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error tracking query frequency: {e}")
             
-    async def _get_adaptive_ttl(self, query: str, base_ttl: int) -> int:
-        """Get adaptive TTL based on query frequency."""
-        normalized = query.lower().strip()
-        frequency = self._query_frequency.get(normalized, 0)
-        
-        # Check Redis for historical frequency
-        if self.base_cache.redis_client:
-            freq_key = f"query_freq:{hashlib.md5(normalized.encode()).hexdigest()}"
-            redis_freq = await self.base_cache.redis_client.get(freq_key)
-            if redis_freq:
-                frequency = max(frequency, int(redis_freq))
+    async def _decay_query_frequencies(self):
+        """Scale down all persisted frequencies, at most once per interval across workers."""
+        if not self.base_cache.redis_client:
+            return
+            
+        try:
+            claimed = await self.base_cache.redis_client.set(
+                self.FREQUENCY_DECAY_KEY, 1,
+                nx=True, ex=self.FREQUENCY_DECAY_INTERVAL
+            )
+            if not claimed:
+                return
                 
-        # Adaptive TTL based on frequency
-        if frequency > 100:
-            return base_ttl * 3  # Triple TTL for very common queries
-        elif frequency > 50:
-            return base_ttl * 2  # Double TTL for common queries
-        elif frequency > 10:
-            return int(base_ttl * 1.5)  # 1.5x TTL for somewhat common
-        else:
-            return base_ttl  # Default TTL
+            async with self.base_cache.redis_client.pipeline(transaction=True) as pipe:
+                pipe.zunionstore(
+                    self.FREQUENCY_KEY,
+                    {self.FREQUENCY_KEY: self.FREQUENCY_DECAY_FACTOR}
+                )
+                pipe.zremrangebyscore(self.FREQUENCY_KEY, "-inf", "(1")
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error decaying query frequencies: {e}")
+            
+    async def _frequency_maintenance_loop(self):
+        """Periodically apply the shared frequency decay."""
+        while True:
+            await asyncio.sleep(self.FREQUENCY_MAINTENANCE_INTERVAL)
+            await self._decay_query_frequencies()
             
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -352,12 +845,19 @@ class AdvancedCacheService:
             total = hits + misses
             stats[f"{level}_hit_rate"] = hits / total if total > 0 else 0
             
-        # Add frequency info
-        stats["top_queries"] = sorted(
-            self._query_frequency.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:10]
+        # Add frequency info from the shared sorted set
+        top_queries = []
+        if self.base_cache.redis_client:
+            try:
+                top_queries = [
+                    (query.decode() if isinstance(query, bytes) else query, int(score))
+                    for query, score in await self.base_cache.redis_client.zrevrange(
+                        self.FREQUENCY_KEY, 0, 9, withscores=True
+                    )
+                ]
+            except Exception as e:
+                logger.error(f"Error reading top queries: {e}")
+        stats["top_queries"] = top_queries
         
         return stats
         
@@ -368,16 +868,27 @@ class AdvancedCacheService:
             "misses": {"l1": 0, "l2": 0, "l3": 0},
             "evictions": 0
         }
-        self._query_frequency.clear()
+
+
+# Process-wide instance, built and initialized once in the app lifespan
+_advanced_cache: Optional[AdvancedCacheService] = None
+
+
+def get_advanced_cache_service() -> Optional[AdvancedCacheService]:
+    """Get the global advanced cache service instance."""
+    return _advanced_cache
+
+
+def set_advanced_cache_service(cache: Optional[AdvancedCacheService]) -> None:
+    """Set the global advanced cache service instance."""
+    global _advanced_cache
+    _advanced_cache = cache
 
 
 def create_context_hash(query: str, documents: List[Any], model: str) -> str:
     """Create a hash of query, document context, and model for cache keys."""
     from langchain_core.documents import Document
     
-    # Include query and model in the hash
-    hash_parts = [query, model]
-    
     # Sort documents by ID for consistency
     def get_doc_id(doc):
         if isinstance(doc, Document):
@@ -386,11 +897,15 @@ def create_context_hash(query: str, documents: List[Any], model: str) -> str:
             return doc.get("id", "")
         return ""
     
-    sorted_docs = sorted(documents, key=get_doc_id)
+    # Only the first 10 docs are hashed, so select them without a full sort
+    sorted_docs = heapq.nsmallest(10, documents, key=get_doc_id)
     
-    # Create hash from document IDs and first 100 chars of content
-    doc_content = ""
-    for doc in sorted_docs[:10]:  # Limit to first 10 docs
+    # Feed the parts straight into the hasher instead of building one string
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{query}|{model}|".encode())
+    
+    # Hash document IDs and first 100 chars of content
+    for doc in sorted_docs:
         if isinstance(doc, Document):
             doc_id = doc.metadata.get("id", "")
             content_preview = doc.page_content[:100] if doc.page_content else ""
@@ -400,10 +915,6 @@ def create_context_hash(query: str, documents: List[Any], model: str) -> str:
         else:
             continue
             
-        doc_content += f"{doc_id}:{content_preview}"
-    
-    hash_parts.append(doc_content)
+        hasher.update(f"{doc_id}:{content_preview}".encode())
     
-    # Combine all parts for the final hash
-    hash_content = "|".join(hash_parts)
-    return hashlib.md5(hash_content.encode()).hexdigest()
\ No newline at end of file
+    return hasher.hexdigest()
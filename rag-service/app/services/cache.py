@@ -2,8 +2,11 @@
 
 import json
 import hashlib
-from typing import Optional, Any, Dict, Callable
+import inspect
+from contextlib import asynccontextmanager
+from typing import Optional, Any, Dict, Callable, Union
 import redis.asyncio as redis
+import redis as redis_sync
 from datetime import timedelta
 from functools import wraps
 import asyncio
@@ -13,6 +16,40 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Try to import optional dependencies
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.info("orjson not available, using stdlib json for cache serialization")
+
+
+def json_dumps(
+    value: Any,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """Serialize a value for the cache, compact and optionally key-sorted.
+    
+    default is called for objects the encoder cannot handle natively.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(value, default=default, option=option).decode()
+    # Same compact layout as orjson so keys match with or without it
+    return json.dumps(
+        value, sort_keys=sort_keys, separators=(",", ":"),
+        ensure_ascii=False, default=default
+    )
+
+
+def json_loads(value: Any) -> Any:
+    """Deserialize a cached value."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(value)
+    return json.loads(value)
+
 
 class CacheService:
     """Redis-based cache service."""
@@ -20,7 +57,13 @@ class CacheService:
     def __init__(self):
         """Initialize cache service."""
         self.redis_client: Optional[redis.Redis] = None
+        # Raw-bytes client for packed binary values (e.g. float16 embeddings)
+        self.redis_binary: Optional[redis.Redis] = None
+        # Blocking client for callers outside the event loop (sync cache_result)
+        self.redis_sync: Optional[redis_sync.Redis] = None
         self.enabled = bool(settings.redis_url)
+        # Serializes connect() so concurrent first callers build one set of pools
+        self._connect_lock = asyncio.Lock()
         
     async def connect(self) -> None:
         """Connect to Redis."""
@@ -28,11 +71,46 @@ class CacheService:
             logger.info("Cache service disabled - no Redis URL configured")
             return
             
+        if self.redis_client is not None:
+            return
+            
+        async with self._connect_lock:
+            # Another caller may have connected while we waited
+            if self.redis_client is not None:
+                return
+            await self._connect()
+            
+    async def _connect(self) -> None:
+        """Create the connection pools and verify the server is reachable."""
         try:
-            self.redis_client = redis.from_url(
-                settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True
+            # Bounded, long-lived pools shared by every caller of this service.
+            # Blocking pools queue callers for up to redis_pool_timeout when all
+            # connections are checked out, instead of failing the command
+            self.redis_client = redis.Redis(
+                connection_pool=redis.BlockingConnectionPool.from_url(
+                    settings.redis_url,
+                    max_connections=settings.redis_max_connections,
+                    timeout=settings.redis_pool_timeout,
+                    encoding="utf-8",
+                    decode_responses=True
+                )
+            )
+            self.redis_binary = redis.Redis(
+                connection_pool=redis.BlockingConnectionPool.from_url(
+                    settings.redis_url,
+                    max_connections=settings.redis_binary_max_connections,
+                    timeout=settings.redis_pool_timeout,
+                    decode_responses=False
+                )
+            )
+            self.redis_sync = redis_sync.Redis(
+                connection_pool=redis_sync.BlockingConnectionPool.from_url(
+                    settings.redis_url,
+                    max_connections=settings.redis_sync_max_connections,
+                    timeout=settings.redis_pool_timeout,
+                    encoding="utf-8",
+                    decode_responses=True
+                )
             )
             
             # Test connection
@@ -43,10 +121,25 @@ class CacheService:
             logger.error(f"Failed to connect to Redis: {e}")
             self.enabled = False
             
+    @asynccontextmanager
+    async def session(self):
+        """Hold one pooled connection across a multi-command operation.
+        
+        Each command on redis_client checks a connection out of the pool
+        and back in; read-then-write sequences run on a single checkout.
+        """
+        async with self.redis_client.client() as conn:
+            yield conn
+            
     async def disconnect(self) -> None:
         """Disconnect from Redis."""
+        if self.redis_sync:
+            self.redis_sync.close()
+            self.redis_sync.connection_pool.disconnect()
+        if self.redis_binary:
+            await self.redis_binary.close(close_connection_pool=True)
         if self.redis_client:
-            await self.redis_client.close()
+            await self.redis_client.close(close_connection_pool=True)
             logger.info("Disconnected from Redis cache")
             
     async def get(self, key: str) -> Optional[Any]:
@@ -57,7 +150,7 @@ class CacheService:
         try:
             value = await self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return json_loads(value)
             return None
             
         except Exception as e:
@@ -75,8 +168,24 @@ class CacheService:
             return False
             
         try:
-            serialized = json.dumps(value)
+            serialized = json_dumps(value)
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return False
             
+        return await self.set_serialized(key, serialized, ttl)
+        
+    async def set_serialized(
+        self,
+        key: str,
+        serialized: str,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Set an already JSON-encoded value in cache."""
+        if not self.enabled or not self.redis_client:
+            return False
+            
+        try:
             if ttl:
                 await self.redis_client.setex(
                     key,
@@ -92,17 +201,82 @@ class CacheService:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
             
-    async def delete(self, key: str) -> bool:
-        """Delete key from cache."""
+    async def set_if_absent(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None
+    ) -> Optional[bool]:
+        """Set value only if key does not exist (SET NX).
+        
+        Returns True if the value was stored, False if the key already
+        existed, and None when the cache could not be consulted.
+        """
         if not self.enabled or not self.redis_client:
+            return None
+            
+        try:
+            stored = await self.redis_client.set(key, json_dumps(value), nx=True, ex=ttl)
+            return bool(stored)
+            
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return None
+            
+    def get_sync(self, key: str) -> Optional[Any]:
+        """Get value from cache without an event loop.
+        
+        Does blocking network I/O, so it must not run on the event-loop
+        thread; there it returns None without touching Redis.
+        """
+        if not self.enabled or not self.redis_sync or _on_event_loop():
+            return None
+            
+        try:
+            value = self.redis_sync.get(key)
+            if value:
+                return json_loads(value)
+            return None
+            
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            return None
+            
+    def set_sync(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Set value in cache without an event loop (never on the loop thread)."""
+        if not self.enabled or not self.redis_sync or _on_event_loop():
+            return False
+            
+        try:
+            serialized = json_dumps(value)
+            
+            if ttl:
+                self.redis_sync.setex(key, timedelta(seconds=ttl), serialized)
+            else:
+                self.redis_sync.set(key, serialized)
+                
+            return True
+            
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return False
+            
+    async def delete(self, *keys: str) -> bool:
+        """Delete one or more keys from cache in a single command."""
+        if not self.enabled or not self.redis_client or not keys:
             return False
             
         try:
-            await self.redis_client.delete(key)
+            await self.redis_client.delete(*keys)
             return True
             
         except Exception as e:
-            logger.error(f"Cache delete error for key {key}: {e}")
+            logger.error(f"Cache delete error for keys {keys}: {e}")
             return False
             
     async def exists(self, key: str) -> bool:
@@ -147,7 +321,7 @@ class CacheService:
         # Include filters in the key
         key_parts = [query]
         if filters:
-            key_parts.append(json.dumps(filters, sort_keys=True))
+            key_parts.append(json_dumps(filters, sort_keys=True))
             
         key_content = "|".join(key_parts)
         key_hash = hashlib.md5(key_content.encode()).hexdigest()
@@ -176,22 +350,46 @@ class EmbeddingCache:
         """Get multiple embeddings from cache."""
         results = {}
         
-        for text in texts:
-            embedding = await self.get_embedding(text)
-            if embedding:
-                results[text] = embedding
+        if not texts or not self.cache.enabled or not self.cache.redis_client:
+            return results
+            
+        try:
+            # One MGET round-trip instead of one GET per text
+            keys = [self.cache.make_embedding_key(text) for text in texts]
+            values = await self.cache.redis_client.mget(keys)
+            
+            for text, value in zip(texts, values):
+                if value:
+                    embedding = json_loads(value)
+                    if embedding:
+                        results[text] = embedding
+                        
+        except Exception as e:
+            logger.error(f"Embedding cache batch get error: {e}")
                 
         return results
         
     async def set_batch(self, embeddings: Dict[str, list]) -> int:
         """Cache multiple embeddings."""
-        count = 0
-        
-        for text, embedding in embeddings.items():
-            if await self.set_embedding(text, embedding):
-                count += 1
+        if not embeddings or not self.cache.enabled or not self.cache.redis_client:
+            return 0
+            
+        try:
+            # Queue every SETEX and send them in a single round-trip
+            async with self.cache.redis_client.pipeline(transaction=False) as pipe:
+                for text, embedding in embeddings.items():
+                    key = self.cache.make_embedding_key(text)
+                    if self.ttl:
+                        pipe.setex(key, timedelta(seconds=self.ttl), json_dumps(embedding))
+                    else:
+                        pipe.set(key, json_dumps(embedding))
+                await pipe.execute()
                 
-        return count
+            return len(embeddings)
+            
+        except Exception as e:
+            logger.error(f"Embedding cache batch set error: {e}")
+            return 0
 
 
 class QueryCache:
@@ -214,11 +412,13 @@ class QueryCache:
     async def set_results(
         self,
         query: str,
-        results: Dict,
+        results: Union[Dict, str],
         filters: Optional[Dict] = None
     ) -> bool:
-        """Cache query results."""
+        """Cache query results, given as a dict or an already-encoded JSON string."""
         key = self.cache.make_query_key(query, filters)
+        if isinstance(results, str):
+            return await self.cache.set_serialized(key, results, self.ttl)
         return await self.cache.set(key, results, self.ttl)
 
 
@@ -237,6 +437,51 @@ def set_cache_service(cache: CacheService) -> None:
     _cache_service = cache
 
 
+# Argument types with a stable JSON encoding, and so usable in a cache key
+_KEY_ARG_TYPES = (str, int, float, bool, type(None))
+
+
+def _make_key_builder(func: Callable, key_prefix: str) -> Callable:
+    """Build the cache-key function for a decorated callable once, up front."""
+    prefix = f"{key_prefix}:{func.__name__}"
+    params = list(inspect.signature(func).parameters.values())
+    
+    # Positional parameter names by index; 'self'/'cls' never identify a result
+    positional = [
+        p.name for p in params
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    ]
+    skip = {"self", "cls"}
+    
+    def make_key(args: tuple, kwargs: dict) -> str:
+        values = dict(zip(positional, args))
+        values.update(kwargs)
+        # JSON keeps each name/value boundary and type unambiguous, so
+        # ("a|b", "c") and ("a", "b|c") or 1 and "1" never share a key
+        encoded = json_dumps(
+            {
+                name: value
+                for name, value in values.items()
+                if name not in skip and isinstance(value, _KEY_ARG_TYPES)
+            },
+            sort_keys=True
+        )
+        digest = hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+        return f"{prefix}:{digest}"
+        
+    return make_key
+
+
+def _on_event_loop() -> bool:
+    """Whether the current thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    logger.debug("Blocking Redis call skipped on the event-loop thread")
+    return True
+
+
 def cache_result(ttl: int = 3600, key_prefix: str = "func"):
     """
     Decorator for caching function results.
@@ -249,6 +494,8 @@ def cache_result(ttl: int = 3600, key_prefix: str = "func"):
         Decorator function
     """
     def decorator(func: Callable) -> Callable:
+        make_key = _make_key_builder(func, key_prefix)
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             cache = get_cache_service()
@@ -256,21 +503,7 @@ def cache_result(ttl: int = 3600, key_prefix: str = "func"):
                 # No cache available, just call the function
                 return await func(*args, **kwargs)
             
-            # Create cache key from function name and arguments
-            cache_key_parts = [key_prefix, func.__name__]
-            
-            # Add string representations of args
-            for arg in args[1:]:  # Skip 'self' if present
-                if hasattr(arg, '__class__') and hasattr(arg.__class__, '__name__'):
-                    # Skip complex objects
-                    continue
-                cache_key_parts.append(str(arg))
-            
-            # Add sorted kwargs
-            for k, v in sorted(kwargs.items()):
-                cache_key_parts.append(f"{k}={v}")
-            
-            cache_key = ":".join(cache_key_parts)
+            cache_key = make_key(args, kwargs)
             
             # Try to get from cache
             cached_result = await cache.get(cache_key)
@@ -289,24 +522,16 @@ def cache_result(ttl: int = 3600, key_prefix: str = "func"):
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # For sync functions, run in event loop
-            loop = asyncio.get_event_loop()
+            # Sync functions use the blocking client, which would stall the
+            # event loop; called on the loop thread they skip the cache
             cache = get_cache_service()
-            if not cache or not cache.enabled:
+            if not cache or not cache.enabled or _on_event_loop():
                 return func(*args, **kwargs)
             
-            # Create cache key
-            cache_key_parts = [key_prefix, func.__name__]
-            for arg in args[1:]:  # Skip 'self'
-                if hasattr(arg, '__class__') and hasattr(arg.__class__, '__name__'):
-                    continue
-                cache_key_parts.append(str(arg))
-            for k, v in sorted(kwargs.items()):
-                cache_key_parts.append(f"{k}={v}")
-            cache_key = ":".join(cache_key_parts)
+            cache_key = make_key(args, kwargs)
             
             # Try to get from cache
-            cached_result = loop.run_until_complete(cache.get(cache_key))
+            cached_result = cache.get_sync(cache_key)
             if cached_result is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached_result
@@ -315,7 +540,7 @@ def cache_result(ttl: int = 3600, key_prefix: str = "func"):
             result = func(*args, **kwargs)
             
             # Cache the result
-            loop.run_until_complete(cache.set(cache_key, result, ttl))
+            cache.set_sync(cache_key, result, ttl)
             logger.debug(f"Cached result for {cache_key}")
             
             return result
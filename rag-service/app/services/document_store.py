@@ -1,9 +1,15 @@
 """Document store service for managing documents."""
 
 from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 import asyncio
+import re
 
+from pydantic import BaseModel
+
+from app.core.config import settings
 from app.core.vectorstore import VectorStoreManager
 from app.core.logging import get_logger
 from app.models.documents import (
@@ -11,14 +17,32 @@ from app.models.documents import (
     DocumentListResponse
 )
 from app.models.query import Source
-from app.services.cache import CacheService, QueryCache
+from app.services.cache import CacheService, QueryCache, json_dumps
 
 logger = get_logger(__name__)
 
 
+class _CachedSearchResults(BaseModel):
+    """Envelope for search results stored in the query cache."""
+    results: List[DocumentSearchResult]
+    cached_at: datetime
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(query: str) -> Optional["re.Pattern[str]"]:
+    """Compile one case-insensitive alternation over the query terms."""
+    terms = sorted(set(query.lower().split()), key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
 class DocumentStore:
     """Service for document storage and retrieval."""
     
+    # Listing pages kept per corpus version; any write moves to a new version
+    LIST_CACHE_SIZE = 64
+    
     def __init__(
         self,
         vector_store_manager: VectorStoreManager,
@@ -28,6 +52,7 @@ class DocumentStore:
         self.vector_store = vector_store_manager
         self.cache_service = cache_service
         self.query_cache = QueryCache(cache_service) if cache_service else None
+        self._list_cache: "OrderedDict[Tuple, DocumentListResponse]" = OrderedDict()
         
     async def search(
         self,
@@ -53,21 +78,21 @@ class DocumentStore:
                 search_type=settings.retrieval_search_type
             )
             
-            # Convert to response format
-            search_results = []
-            for doc, score in results:
-                # Extract document from metadata
-                doc_result = DocumentSearchResult(
+            # Convert to response format, reading each metadata dict once
+            now = datetime.utcnow()
+            search_results = [
+                DocumentSearchResult(
                     document=Document(
-                        id=doc.metadata.get("id", ""),
+                        id=(metadata := doc.metadata).get("id", ""),
                         content=doc.page_content,
-                        metadata=doc.metadata,
-                        created_at=doc.metadata.get("created_at", datetime.utcnow())
+                        metadata=metadata,
+                        created_at=metadata.get("created_at", now)
                     ),
                     score=score if request.include_scores else None,
                     highlights=self._extract_highlights(doc.page_content, request.query)
                 )
-                search_results.append(doc_result)
+                for doc, score in results
+            ]
                 
             # Cache results
             if self.query_cache:
@@ -86,21 +111,19 @@ class DocumentStore:
     async def get_by_id(self, document_id: str) -> Optional[Document]:
         """Get document by ID."""
         try:
-            # Search by metadata filter
-            results = await self.vector_store.search(
-                query="",  # Empty query
-                k=1,
-                filter_dict={"id": document_id}
-            )
-            
-            if results:
-                doc, _ = results[0]
-                return Document(
-                    id=doc.metadata.get("id", ""),
-                    content=doc.page_content,
-                    metadata=doc.metadata,
-                    created_at=doc.metadata.get("created_at", datetime.utcnow())
+            # Look up by metadata only; fall back to a filtered search on
+            # stores that cannot fetch without a query
+            docs = await self.vector_store.get_by_filter({"id": document_id}, limit=1)
+            if docs is None:
+                results = await self.vector_store.search(
+                    query="",  # Empty query
+                    k=1,
+                    filter_dict={"id": document_id}
                 )
+                docs = [doc for doc, _ in results]
+            
+            if docs:
+                return self._to_document(docs[0])
                 
             return None
             
@@ -116,19 +139,59 @@ class DocumentStore:
     ) -> DocumentListResponse:
         """List documents with pagination."""
         try:
-            # Get collection stats
-            stats = await self.vector_store.get_collection_stats()
-            total_count = stats.get("document_count", 0)
-            
-            # For now, return empty list as we need to implement proper listing
-            # This would require additional metadata storage
-            return DocumentListResponse(
-                documents=[],
+            # Pages are only valid for the corpus version they were read at
+            cache_key = (
+                await self.vector_store.get_version(),
+                page,
+                page_size,
+                json_dumps(filters or {}, sort_keys=True, default=str)
+            )
+            cached = self._list_cache.get(cache_key)
+            if cached is not None:
+                self._list_cache.move_to_end(cache_key)
+                return cached
+                
+            # The total is for the filtered set, not the whole collection
+            total_count = None
+            if filters:
+                total_count = await self.vector_store.count_by_filter(filters)
+            if total_count is None:
+                stats = await self.vector_store.get_collection_stats()
+                total_count = stats.get("document_count", 0)
+            
+            # Let the store apply the filter and the page window. Chroma's get()
+            # cannot order by metadata or range-compare strings, so keyset
+            # (created_at, id) cursors are not expressible; repeat reads of
+            # deep pages are absorbed by the per-version cache above instead
+            offset = (page - 1) * page_size
+            # Raw rows go straight into the response models; no intermediate
+            # LangChain document is built per chunk just to be unpacked again
+            rows = await self.vector_store.get_rows_by_filter(
+                filters,
+                limit=page_size,
+                offset=offset
+            )
+            
+            documents = []
+            now = datetime.utcnow()
+            for content, metadata in rows or []:
+                try:
+                    documents.append(self._row_to_document(content, metadata, now))
+                except Exception as e:
+                    logger.debug(f"Skipping unlistable chunk {metadata.get('id')}: {e}")
+                    
+            response = DocumentListResponse(
+                documents=documents,
                 total=total_count,
                 page=page,
                 page_size=page_size
             )
             
+            self._list_cache[cache_key] = response
+            if len(self._list_cache) > self.LIST_CACHE_SIZE:
+                self._list_cache.popitem(last=False)
+            return response
+            
         except Exception as e:
             logger.error(f"Failed to list documents: {e}")
             raise
@@ -136,25 +199,15 @@ class DocumentStore:
     async def delete_by_id(self, document_id: str) -> bool:
         """Delete document by ID."""
         try:
-            # Find all chunks with this parent ID
-            results = await self.vector_store.search(
-                query="",
-                k=1000,  # Get all chunks
-                filter_dict={"parent_id": document_id}
-            )
+            # Delete all chunks with this parent ID inside the vector store
+            deleted = await self.vector_store.delete_by_filter({"parent_id": document_id})
             
-            # Extract chunk IDs
-            chunk_ids = [doc.metadata.get("id") for doc, _ in results]
-            
-            if chunk_ids:
-                # Delete from vector store
-                success = await self.vector_store.delete_documents(ids=chunk_ids)
-                
+            if deleted:
                 # Clear from cache
                 if self.cache_service:
                     await self.cache_service.delete(f"doc:{document_id}")
                     
-                return success
+                return True
                 
             return False
             
@@ -162,6 +215,49 @@ class DocumentStore:
             logger.error(f"Failed to delete document {document_id}: {e}")
             return False
             
+    async def delete_many(self, document_ids: List[str]) -> int:
+        """Delete several documents and their chunks; returns chunks removed.
+        
+        Vector store errors propagate, so callers can tell a failed delete
+        from one that found nothing.
+        """
+        if not document_ids:
+            return 0
+            
+        # One filtered delete for every document instead of one per ID
+        deleted = await self.vector_store.delete_by_filter(
+            {"parent_id": {"$in": list(document_ids)}}
+        )
+        
+        if deleted and self.cache_service:
+            await self.cache_service.delete(*(f"doc:{doc_id}" for doc_id in document_ids))
+            
+        return deleted
+            
+    def _to_document(self, doc: Any, now: Optional[datetime] = None) -> Document:
+        """Build a Document from a stored chunk's text and metadata.
+        
+        now stands in for a missing created_at; batch callers pass one shared value.
+        """
+        return self._row_to_document(doc.page_content, doc.metadata, now)
+        
+    def _row_to_document(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        now: Optional[datetime] = None
+    ) -> Document:
+        """Build a Document from a raw (text, metadata) row."""
+        created_at = metadata.get("created_at")
+        if created_at is None:
+            created_at = now or datetime.utcnow()
+        return Document(
+            id=metadata.get("id", ""),
+            content=content,
+            metadata=metadata,
+            created_at=created_at
+        )
+        
     def convert_to_sources(
         self,
         documents: List[Tuple[Any, float]],
@@ -192,42 +288,45 @@ class DocumentStore:
     def _extract_highlights(self, content: str, query: str) -> List[str]:
         """Extract highlighted snippets from content."""
         highlights = []
-        
-        # Simple keyword highlighting
-        query_terms = query.lower().split()
-        sentences = content.split(". ")
-        
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            if any(term in sentence_lower for term in query_terms):
-                # Trim to reasonable length
-                if len(sentence) > 200:
-                    sentence = sentence[:200] + "..."
-                highlights.append(sentence)
+        pattern = _highlight_pattern(query)
+        if pattern is None:
+            return highlights
+            
+        # Jump straight to term matches and expand each to its ". "-delimited
+        # sentence, instead of lowercasing and scanning every sentence
+        pos = 0
+        while len(highlights) < 3:
+            match = pattern.search(content, pos)
+            if match is None:
+                break
                 
-                if len(highlights) >= 3:
-                    break
-                    
+            start = content.rfind(". ", 0, match.start())
+            start = 0 if start == -1 else start + 2
+            end = content.find(". ", start)
+            end = len(content) if end == -1 else end
+            
+            if match.end() > end and pattern.search(content, match.start(), end) is None:
+                # Only match runs across a separator; the sentence has no term
+                pos = end + 2
+                continue
+                
+            sentence = content[start:end]
+            # Trim to reasonable length
+            if len(sentence) > 200:
+                sentence = sentence[:200] + "..."
+            highlights.append(sentence)
+            pos = end + 2
+            
         return highlights
         
-    def _serialize_results(self, results: List[DocumentSearchResult]) -> Dict:
-        """Serialize results for caching."""
-        return {
-            "results": [
-                {
-                    "document": {
-                        "id": r.document.id,
-                        "content": r.document.content,
-                        "metadata": r.document.metadata.model_dump() if hasattr(r.document.metadata, 'model_dump') else r.document.metadata,
-                        "created_at": r.document.created_at.isoformat()
-                    },
-                    "score": r.score,
-                    "highlights": r.highlights
-                }
-                for r in results
-            ],
-            "cached_at": datetime.utcnow().isoformat()
-        }
+    def _serialize_results(self, results: List[DocumentSearchResult]) -> str:
+        """Serialize results for caching in a single JSON encoding pass."""
+        # pydantic-core writes the nested models and datetimes straight to
+        # JSON, so no Python hook runs per document or metadata object
+        return _CachedSearchResults.model_construct(
+            results=results,
+            cached_at=datetime.utcnow()
+        ).model_dump_json(exclude={"results": {"__all__": {"document": {"embedding"}}}})
         
     def _deserialize_results(self, cached: Dict) -> List[DocumentSearchResult]:
         """Deserialize cached results."""
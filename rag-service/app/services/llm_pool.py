@@ -1,10 +1,13 @@
 """LLM Connection Pool Manager for reducing cold start latency."""
 
 import asyncio
-from typing import Dict, Optional, List, Any
-from datetime import datetime, timedelta
+from collections import deque
+from typing import Dict, Optional, List, Any, Deque, Set, Tuple
+import time
 import threading
-from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -18,44 +21,114 @@ from app.utils.langchain_utils import RetryableLLM
 
 logger = get_logger(__name__)
 
+# One keep-alive HTTP client per provider, shared by every pooled LLM of that
+# provider so TCP/TLS connections are reused instead of set up per instance
+_shared_http_clients: Dict[Provider, httpx.AsyncClient] = {}
+_shared_http_clients_lock = threading.Lock()
+
+
+def _shared_http_client(provider: Provider, max_connections: int) -> httpx.AsyncClient:
+    """Get (or create) the shared async HTTP client for a provider."""
+    client = _shared_http_clients.get(provider)
+    if client is None:
+        # LLMs are constructed in worker threads, so guard the first creation
+        with _shared_http_clients_lock:
+            client = _shared_http_clients.get(provider)
+            if client is None:
+                client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=max_connections,
+                        max_connections=max_connections * 2
+                    )
+                )
+                _shared_http_clients[provider] = client
+    return client
+
 
 class LLMConnection:
     """Wrapper for an LLM connection with health tracking."""
     
+    # Health-check spacing: reset to the minimum after a failure, doubled
+    # after each successful ping up to the maximum
+    MIN_CHECK_INTERVAL = 30
+    MAX_CHECK_INTERVAL = 300
+    
     def __init__(self, llm: Any, provider: Provider, model: str):
         self.llm = llm
         self.provider = provider
         self.model = model
-        self.created_at = datetime.utcnow()
-        self.last_used = datetime.utcnow()
+        # Monotonic seconds; only ever used for age/idle deltas
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
         self.in_use = False
         self.health_check_failures = 0
-        self._lock = threading.Lock()
+        self.check_interval = self.MIN_CHECK_INTERVAL
+        self.next_check_at = self.created_at + self.check_interval
     
     @property
     def age(self) -> float:
         """Age of connection in seconds."""
-        return (datetime.utcnow() - self.created_at).total_seconds()
+        return time.monotonic() - self.created_at
     
     @property
     def idle_time(self) -> float:
         """Time since last use in seconds."""
-        return (datetime.utcnow() - self.last_used).total_seconds()
+        return time.monotonic() - self.last_used
     
     def acquire(self) -> bool:
-        """Try to acquire this connection."""
-        with self._lock:
-            if not self.in_use:
-                self.in_use = True
-                self.last_used = datetime.utcnow()
-                return True
-            return False
+        """Try to acquire this connection.
+        
+        Callers hold the pool lock, which already serializes the check-and-set.
+        """
+        if not self.in_use:
+            self.in_use = True
+            self.last_used = time.monotonic()
+            return True
+        return False
     
     def release(self):
         """Release this connection."""
-        with self._lock:
-            self.in_use = False
-            self.last_used = datetime.utcnow()
+        self.in_use = False
+        self.last_used = time.monotonic()
+        # A completed request is as good as a ping
+        self.next_check_at = max(self.next_check_at, self.last_used + self.check_interval)
+    
+    @property
+    def check_due(self) -> bool:
+        """Whether an idle health check is due."""
+        return not self.in_use and time.monotonic() >= self.next_check_at
+    
+    def record_check(self, healthy: bool):
+        """Record a health check result and schedule the next one."""
+        if healthy:
+            self.health_check_failures = 0
+            self.check_interval = min(self.check_interval * 2, self.MAX_CHECK_INTERVAL)
+        else:
+            self.health_check_failures += 1
+            self.check_interval = self.MIN_CHECK_INTERVAL
+        self.next_check_at = time.monotonic() + self.check_interval
+
+
+class _Borrow:
+    """Async context manager for one borrowed pool connection."""
+    
+    __slots__ = ("pool", "provider", "model", "conn")
+    
+    def __init__(self, pool: "LLMPool"):
+        self.pool = pool
+        self.provider = None
+        self.model = None
+        self.conn = None
+    
+    async def __aenter__(self) -> Any:
+        self.conn = await self.pool._acquire_connection(self.provider, self.model)
+        return self.conn.llm
+    
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        conn, self.conn = self.conn, None
+        self.pool._release_connection(conn)
+        self.pool._recycle_borrow(self)
+        return False
 
 
 class LLMPool:
@@ -71,39 +144,86 @@ class LLMPool:
         self.max_idle_time = max_idle_time
         self.max_age = max_age
         
-        # Pool storage: provider:model -> list of connections
+        # Pool storage: provider:model -> list of connections. The list holds
+        # every connection for scans; free/busy index the same connections so
+        # borrowing and returning are O(1)
         self._pools: Dict[str, List[LLMConnection]] = {}
-        self._pool_lock = threading.Lock()
+        self._free: Dict[str, Deque[LLMConnection]] = {}
+        self._busy: Dict[str, Set[LLMConnection]] = {}
+        # pool key -> (provider, model), so keys never need parsing back
+        self._pool_meta: Dict[str, Tuple[Provider, str]] = {}
+        # Every caller is a coroutine on the event loop, so waits should be
+        # coroutine suspensions rather than blocking thread locks
+        self._pool_lock = asyncio.Lock()
+        self._create_locks: Dict[str, asyncio.Lock] = {}
+        # LLM clients are built on a small dedicated executor so a burst of
+        # pool misses cannot crowd out other to_thread users
+        self._ctor_executor = ThreadPoolExecutor(
+            max_workers=min(8, max_connections),
+            thread_name_prefix="llm-ctor"
+        )
         self._shutdown = False
         
-        # Start background tasks
+        # Reusable borrow handles, so steady-state acquires allocate nothing
+        self._borrows: List[_Borrow] = []
+        
+        # Background tasks start with the first acquire (or initialize()), so
+        # processes that never call an LLM never ping or poll
         self._health_check_task = None
         self._cleanup_task = None
+        self._warm_task = None
+        # Set once by whichever of initialize() or the first acquire claims
+        # startup, so the default models are only ever warmed once
+        self._started = False
     
     def _get_pool_key(self, provider: Provider, model: str) -> str:
         """Get pool key for provider and model."""
         return f"{provider.value}:{model}"
     
     async def initialize(self):
-        """Initialize the pool and start background tasks."""
+        """Eagerly pre-warm the pool and start background tasks."""
+        if not await self._claim_start():
+            return
         logger.info("Initializing LLM connection pool")
-        
-        # Pre-warm connections for commonly used models
+        await self._warm_default_models()
+        self._start_background_tasks()
+        logger.info("LLM connection pool initialized")
+    
+    async def _warm_default_models(self):
+        """Pre-warm connections for commonly used models."""
         warm_configs = [
             (Provider.OPENAI, settings.openai_chat_model),
             (Provider.GOOGLE, settings.google_chat_model),
             (Provider.ANTHROPIC, settings.anthropic_chat_model)
         ]
         
-        for provider, model in warm_configs:
-            if self._has_api_key(provider):
-                await self._ensure_min_connections(provider, model)
-        
-        # Start background tasks
-        self._health_check_task = asyncio.create_task(self._health_check_loop())
-        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
-        
-        logger.info("LLM connection pool initialized")
+        await asyncio.gather(*[
+            self._ensure_min_connections(provider, model)
+            for provider, model in warm_configs
+            if self._has_api_key(provider)
+        ])
+    
+    def _start_background_tasks(self):
+        """Start the health-check and cleanup loops if not yet running."""
+        if self._health_check_task is None and not self._shutdown:
+            self._health_check_task = asyncio.create_task(self._health_check_loop())
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+    
+    async def _claim_start(self) -> bool:
+        """Mark the pool started; False if initialize() or an acquire already did."""
+        async with self._pool_lock:
+            if self._started or self._shutdown:
+                return False
+            self._started = True
+            return True
+    
+    async def _lazy_start(self):
+        """Start background work on first use when initialize() was skipped."""
+        if not await self._claim_start():
+            return
+        self._start_background_tasks()
+        # Warm the default models without holding up this first request
+        self._warm_task = asyncio.create_task(self._warm_default_models())
     
     async def shutdown(self):
         """Shutdown the pool and cleanup resources."""
@@ -115,10 +235,17 @@ class LLMPool:
             self._health_check_task.cancel()
         if self._cleanup_task:
             self._cleanup_task.cancel()
+        if self._warm_task:
+            self._warm_task.cancel()
+        
+        self._ctor_executor.shutdown(wait=False, cancel_futures=True)
         
         # Clear all connections
-        with self._pool_lock:
+        async with self._pool_lock:
             self._pools.clear()
+            self._free.clear()
+            self._busy.clear()
+            self._pool_meta.clear()
     
     def _has_api_key(self, provider: Provider) -> bool:
         """Check if API key is configured for provider."""
@@ -144,18 +271,22 @@ class LLMPool:
                 model == 'o1-mini'
             ))
             
+            http_client = _shared_http_client(provider, self.max_connections)
+            
             # O-series models don't support temperature parameter
             if is_o_series:
                 llm = ChatOpenAI(
                     api_key=settings.openai_api_key,
                     model=model,
-                    max_tokens=8192
+                    max_tokens=8192,
+                    http_async_client=http_client
                 )
             else:
                 llm = ChatOpenAI(
                     api_key=settings.openai_api_key,
                     model=model,
-                    temperature=0.7
+                    temperature=0.7,
+                    http_async_client=http_client
                 )
             return RetryableLLM(llm)
             
@@ -207,79 +338,155 @@ class LLMPool:
         """Ensure minimum connections exist for a provider/model."""
         pool_key = self._get_pool_key(provider, model)
         
-        with self._pool_lock:
-            pool = self._pools.get(pool_key, [])
-            active_count = len([c for c in pool if c.health_check_failures < 3])
-            
-            needed = self.min_connections - active_count
-            if needed > 0:
-                logger.info(f"Creating {needed} connections for {pool_key}")
-        
-        # Create connections outside the lock
-        for _ in range(needed):
-            try:
-                # Create in thread to avoid blocking
-                llm = await asyncio.to_thread(self._create_llm, provider, model)
-                conn = LLMConnection(llm, provider, model)
+        # Holding the key's create lock keeps concurrent callers from each
+        # seeing the same shortfall and over-filling the pool
+        async with self._create_lock(pool_key):
+            async with self._pool_lock:
+                pool = self._pools.get(pool_key, [])
+                active_count = len([c for c in pool if c.health_check_failures < 3])
                 
-                # Warm up the connection
-                await self._warm_connection(conn)
+                needed = self.min_connections - active_count
+                if needed > 0:
+                    logger.info(f"Creating {needed} connections for {pool_key}")
+            
+            if needed <= 0:
+                return
                 
-                # Add to pool
-                with self._pool_lock:
-                    if pool_key not in self._pools:
-                        self._pools[pool_key] = []
-                    self._pools[pool_key].append(conn)
+            # Create and warm all connections concurrently, outside the pool
+            # lock, so the handshakes and warm-up round-trips overlap
+            results = await asyncio.gather(
+                *[self._create_and_warm(provider, model) for _ in range(needed)],
+                return_exceptions=True
+            )
+            
+            created = []
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to create connection for {pool_key}: {result}")
+                else:
+                    created.append(result)
                     
-            except Exception as e:
-                logger.error(f"Failed to create connection for {pool_key}: {e}")
+            if created:
+                async with self._pool_lock:
+                    for conn in created:
+                        self._add_connection(pool_key, conn)
+    
+    async def _create_and_warm(self, provider: Provider, model: str) -> LLMConnection:
+        """Create a connection in a worker thread and warm it up."""
+        llm = await asyncio.get_running_loop().run_in_executor(
+            self._ctor_executor, self._create_llm, provider, model
+        )
+        conn = LLMConnection(llm, provider, model)
+        await self._warm_connection(conn)
+        return conn
     
-    @asynccontextmanager
-    async def acquire(self, provider: Provider, model: str):
-        """Acquire a connection from the pool."""
+    def acquire(self, provider: Provider, model: str) -> "_Borrow":
+        """Borrow a connection: ``async with pool.acquire(provider, model) as llm``."""
+        borrow = self._borrows.pop() if self._borrows else _Borrow(self)
+        borrow.provider = provider
+        borrow.model = model
+        return borrow
+    
+    def _recycle_borrow(self, borrow: "_Borrow"):
+        """Return a finished borrow handle to the freelist."""
+        if len(self._borrows) < self.max_connections:
+            self._borrows.append(borrow)
+    
+    async def _acquire_connection(self, provider: Provider, model: str) -> LLMConnection:
+        """Claim an idle connection, creating one if none is free."""
+        if not self._started:
+            await self._lazy_start()
+            
         pool_key = self._get_pool_key(provider, model)
-        conn = None
         
-        try:
-            # Try to get an existing connection
-            with self._pool_lock:
-                pool = self._pools.get(pool_key, [])
-                for c in pool:
-                    if c.acquire():
-                        conn = c
-                        logger.debug(f"Acquired existing connection for {pool_key}")
-                        break
-            
-            # If no connection available, create a new one
-            if not conn:
+        # Try to get an existing connection
+        async with self._pool_lock:
+            conn = self._claim_idle(pool_key)
+        if conn:
+            return conn
+        
+        # Simultaneous misses for the same key queue here, so a connection
+        # released or created meanwhile is reused instead of built again
+        async with self._create_lock(pool_key):
+            async with self._pool_lock:
+                conn = self._claim_idle(pool_key)
+                if conn:
+                    return conn
+                    
                 # Check if we're at max connections
-                with self._pool_lock:
-                    total_connections = sum(len(p) for p in self._pools.values())
-                    if total_connections >= self.max_connections:
-                        # Try to evict an idle connection
-                        evicted = self._evict_idle_connection()
-                        if not evicted:
-                            raise RuntimeError("Connection pool exhausted")
-                
-                # Create new connection
-                logger.info(f"Creating new connection for {pool_key}")
-                llm = await asyncio.to_thread(self._create_llm, provider, model)
-                conn = LLMConnection(llm, provider, model)
-                conn.acquire()
-                
-                # Add to pool
-                with self._pool_lock:
-                    if pool_key not in self._pools:
-                        self._pools[pool_key] = []
-                    self._pools[pool_key].append(conn)
+                total_connections = sum(len(p) for p in self._pools.values())
+                if total_connections >= self.max_connections:
+                    # Try to evict an idle connection
+                    evicted = self._evict_idle_connection()
+                    if not evicted:
+                        raise RuntimeError("Connection pool exhausted")
             
-            # Yield the LLM
-            yield conn.llm
+            # Create new connection
+            logger.info(f"Creating new connection for {pool_key}")
+            llm = await asyncio.get_running_loop().run_in_executor(
+                self._ctor_executor, self._create_llm, provider, model
+            )
+            conn = LLMConnection(llm, provider, model)
+            conn.acquire()
             
-        finally:
-            # Release the connection
-            if conn:
-                conn.release()
+            # Add to pool
+            async with self._pool_lock:
+                self._add_connection(pool_key, conn)
+            return conn
+    
+    def _claim_idle(self, pool_key: str) -> Optional[LLMConnection]:
+        """Claim a free connection for pool_key. Must be called with lock held."""
+        free = self._free.get(pool_key)
+        if not free:
+            return None
+        conn = free.popleft()
+        conn.acquire()
+        self._busy[pool_key].add(conn)
+        logger.debug(f"Acquired existing connection for {pool_key}")
+        return conn
+    
+    def _release_connection(self, conn: LLMConnection):
+        """Mark a borrowed connection free again.
+        
+        Runs without awaiting, so it cannot interleave with a pool-lock holder.
+        Connections removed from the pool while borrowed are not returned.
+        """
+        conn.release()
+        pool_key = self._get_pool_key(conn.provider, conn.model)
+        busy = self._busy.get(pool_key)
+        if busy is not None and conn in busy:
+            busy.remove(conn)
+            self._free[pool_key].append(conn)
+    
+    def _add_connection(self, pool_key: str, conn: LLMConnection):
+        """Add a connection to the pool. Must be called with lock held."""
+        self._pools.setdefault(pool_key, []).append(conn)
+        self._pool_meta[pool_key] = (conn.provider, conn.model)
+        free = self._free.setdefault(pool_key, deque())
+        busy = self._busy.setdefault(pool_key, set())
+        if conn.in_use:
+            busy.add(conn)
+        else:
+            free.append(conn)
+    
+    def _set_connections(self, pool_key: str, connections: List[LLMConnection]):
+        """Replace a pool's connections, dropping it if empty. Lock must be held."""
+        if not connections:
+            self._pools.pop(pool_key, None)
+            self._free.pop(pool_key, None)
+            self._busy.pop(pool_key, None)
+            self._pool_meta.pop(pool_key, None)
+            return
+        self._pools[pool_key] = connections
+        self._free[pool_key] = deque(c for c in connections if not c.in_use)
+        self._busy[pool_key] = {c for c in connections if c.in_use}
+    
+    def _create_lock(self, pool_key: str) -> asyncio.Lock:
+        """Lock serializing connection creation for one pool key."""
+        lock = self._create_locks.get(pool_key)
+        if lock is None:
+            lock = self._create_locks[pool_key] = asyncio.Lock()
+        return lock
     
     def _evict_idle_connection(self) -> bool:
         """Evict the most idle connection. Must be called with lock held."""
@@ -295,6 +502,7 @@ class LLMPool:
         
         if oldest_idle and oldest_pool_key:
             self._pools[oldest_pool_key].remove(oldest_idle)
+            self._free[oldest_pool_key].remove(oldest_idle)
             logger.info(f"Evicted idle connection for {oldest_pool_key}")
             return True
         
@@ -306,34 +514,38 @@ class LLMPool:
             try:
                 await asyncio.sleep(60)  # Check every minute
                 
-                with self._pool_lock:
+                async with self._pool_lock:
                     all_connections = []
                     for pool in self._pools.values():
                         all_connections.extend(pool)
                 
-                # Test connections outside the lock
-                for conn in all_connections:
-                    if not conn.in_use and conn.idle_time > 30:
-                        try:
-                            test_message = HumanMessage(content="ping")
-                            await conn.llm.ainvoke([test_message], max_tokens=5)
-                            conn.health_check_failures = 0
-                        except Exception as e:
-                            logger.warning(f"Health check failed for {conn.provider.value}:{conn.model}: {e}")
-                            conn.health_check_failures += 1
+                # Test connections outside the lock, all at once
+                targets = [conn for conn in all_connections if conn.check_due]
+                if targets:
+                    await asyncio.gather(*[self._ping(conn) for conn in targets])
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Health check loop error: {e}")
     
+    async def _ping(self, conn: LLMConnection):
+        """Health-check one idle connection."""
+        try:
+            test_message = HumanMessage(content="ping")
+            await conn.llm.ainvoke([test_message], max_tokens=5)
+            conn.record_check(True)
+        except Exception as e:
+            logger.warning(f"Health check failed for {conn.provider.value}:{conn.model}: {e}")
+            conn.record_check(False)
+    
     async def _cleanup_loop(self):
         """Periodically cleanup old/unhealthy connections."""
         while not self._shutdown:
             try:
                 await asyncio.sleep(30)  # Cleanup every 30 seconds
                 
-                with self._pool_lock:
+                async with self._pool_lock:
                     for pool_key, pool in list(self._pools.items()):
                         # Remove unhealthy or old connections
                         healthy_connections = []
@@ -347,16 +559,11 @@ class LLMPool:
                             else:
                                 healthy_connections.append(conn)
                         
-                        self._pools[pool_key] = healthy_connections
-                        
                         # Remove empty pools
-                        if not healthy_connections:
-                            del self._pools[pool_key]
+                        self._set_connections(pool_key, healthy_connections)
                 
                 # Ensure minimum connections for active pools
-                for pool_key in list(self._pools.keys()):
-                    provider_str, model = pool_key.split(":", 1)
-                    provider = Provider(provider_str)
+                for provider, model in list(self._pool_meta.values()):
                     await self._ensure_min_connections(provider, model)
                 
             except asyncio.CancelledError:
@@ -364,20 +571,19 @@ class LLMPool:
             except Exception as e:
                 logger.error(f"Cleanup loop error: {e}")
     
-    def get_stats(self) -> Dict[str, Any]:
+    async def get_stats(self) -> Dict[str, Any]:
         """Get pool statistics."""
-        with self._pool_lock:
+        async with self._pool_lock:
             stats = {
                 "total_connections": sum(len(p) for p in self._pools.values()),
                 "pools": {}
             }
             
             for pool_key, pool in self._pools.items():
-                in_use = sum(1 for c in pool if c.in_use)
                 stats["pools"][pool_key] = {
                     "total": len(pool),
-                    "in_use": in_use,
-                    "available": len(pool) - in_use,
+                    "in_use": len(self._busy[pool_key]),
+                    "available": len(self._free[pool_key]),
                     "healthy": sum(1 for c in pool if c.health_check_failures == 0)
                 }
             
@@ -408,5 +614,10 @@ async def shutdown_llm_pool():
     if _llm_pool:
         await _llm_pool.shutdown()
         _llm_pool = None
-# Export singleton instance
-llm_pool = get_llm_pool()
\ No newline at end of file
+        
+    for client in list(_shared_http_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Failed to close shared HTTP client: {e}")
+    _shared_http_clients.clear()
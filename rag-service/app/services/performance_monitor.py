@@ -1,12 +1,12 @@
 """Performance monitoring for the RAG system."""
 
+import math
 import time
 import asyncio
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
-from contextlib import asynccontextmanager
-import statistics
+from collections import deque
+from functools import lru_cache
 
 from app.core.logging import get_logger
 from app.core.config import settings
@@ -14,9 +14,22 @@ from app.core.config import settings
 logger = get_logger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _cache_counter_names(cache_level: str) -> tuple:
+    """Hit and miss counter names for a cache level."""
+    return f"cache_{cache_level}_hits", f"cache_{cache_level}_misses"
+
+
 class PerformanceMetric:
     """Single performance metric with history."""
     
+    # record() runs on every request path; slots keep its attribute access
+    # off the instance dict
+    __slots__ = (
+        "name", "window_size", "values", "timestamps",
+        "total_count", "total_sum", "window_sum", "evictions"
+    )
+    
     def __init__(self, name: str, window_size: int = 1000):
         """Initialize performance metric."""
         self.name = name
@@ -25,13 +38,27 @@ class PerformanceMetric:
         self.timestamps = deque(maxlen=window_size)
         self.total_count = 0
         self.total_sum = 0.0
-        
-    def record(self, value: float, timestamp: Optional[datetime] = None):
-        """Record a new value."""
+        # Sum of the values currently in the window, kept in step with the
+        # deque so the mean never has to walk it
+        self.window_sum = 0.0
+        # Evictions since window_sum was last recomputed from scratch
+        self.evictions = 0
+        
+    def record(self, value: float, timestamp: Optional[int] = None):
+        """Record a new value; timestamp is time.monotonic_ns()."""
         if timestamp is None:
-            timestamp = datetime.utcnow()
+            timestamp = time.monotonic_ns()
             
+        if len(self.values) == self.window_size:
+            self.window_sum -= self.values[0]
+            self.evictions += 1
         self.values.append(value)
+        self.window_sum += value
+        if self.evictions >= self.window_size:
+            # Subtracting evicted values accumulates float error; resync once
+            # per full window turnover so the cost stays O(1) amortized
+            self.window_sum = math.fsum(self.values)
+            self.evictions = 0
         self.timestamps.append(timestamp)
         self.total_count += 1
         self.total_sum += value
@@ -59,16 +86,16 @@ class PerformanceMetric:
         
         # Calculate rate
         if len(self.timestamps) > 1:
-            time_span = (self.timestamps[-1] - self.timestamps[0]).total_seconds()
+            time_span = (self.timestamps[-1] - self.timestamps[0]) / 1e9
             rate_per_minute = (len(self.values) / time_span) * 60 if time_span > 0 else 0
         else:
             rate_per_minute = 0
             
         return {
             "count": self.total_count,
-            "mean": statistics.mean(self.values),
-            "min": min(self.values),
-            "max": max(self.values),
+            "mean": self.window_sum / len(self.values),
+            "min": sorted_values[0],
+            "max": sorted_values[-1],
             "p50": sorted_values[p50_idx],
             "p95": sorted_values[p95_idx],
             "p99": sorted_values[p99_idx],
@@ -77,13 +104,44 @@ class PerformanceMetric:
         }
 
 
+class _LatencyTimer:
+    """Async context manager recording the block's duration as a latency."""
+    
+    __slots__ = ("monitor", "metric_name", "start_ns")
+    
+    def __init__(self, monitor: "PerformanceMonitor", metric_name: str):
+        self.monitor = monitor
+        self.metric_name = metric_name
+        self.start_ns = 0
+        
+    async def __aenter__(self):
+        self.start_ns = time.monotonic_ns()
+        
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        latency_ms = (time.monotonic_ns() - self.start_ns) / 1e6
+        self.monitor.record_latency(self.metric_name, latency_ms)
+        return False
+
+
 class PerformanceMonitor:
     """Monitor and track performance metrics for the RAG system."""
     
+    # Counters the service always reports, created up front at zero.
+    # Anything else (per-provider tokens, per-retriever docs) is added on
+    # first increment
+    KNOWN_COUNTERS = (
+        "total_requests", "failed_requests",
+        "streaming_requests", "streaming_errors", "streaming_connections_closed",
+        "cache_l1_hits", "cache_l1_misses",
+        "cache_l2_hits", "cache_l2_misses",
+        "cache_l3_hits", "cache_l3_misses",
+        "retrieval_errors", "llm_errors", "cache_errors", "timeout_errors",
+    )
+    
     def __init__(self):
         """Initialize performance monitor."""
         self.metrics: Dict[str, PerformanceMetric] = {}
-        self.counters: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = dict.fromkeys(self.KNOWN_COUNTERS, 0)
         self.gauges: Dict[str, float] = {}
         self.start_time = datetime.utcnow()
         
@@ -117,7 +175,7 @@ class PerformanceMonitor:
         
     def increment_counter(self, counter_name: str, value: int = 1):
         """Increment a counter."""
-        self.counters[counter_name] += value
+        self.counters[counter_name] = self.counters.get(counter_name, 0) + value
         
     def set_gauge(self, gauge_name: str, value: float):
         """Set a gauge value."""
@@ -125,13 +183,14 @@ class PerformanceMonitor:
         
     def record_cache_hit(self, cache_level: str, hit: bool):
         """Record cache hit/miss."""
-        self.increment_counter(f"cache_{cache_level}_{'hits' if hit else 'misses'}")
-        
-        # Update hit rate metric
-        total = self.counters.get(f"cache_{cache_level}_hits", 0) + self.counters.get(f"cache_{cache_level}_misses", 0)
-        if total > 0:
-            hit_rate = self.counters.get(f"cache_{cache_level}_hits", 0) / total
-            self.metrics["cache_hit_rate"].record(hit_rate)
+        hits_name, misses_name = _cache_counter_names(cache_level)
+        name = hits_name if hit else misses_name
+        self.counters[name] = self.counters.get(name, 0) + 1
+        
+        # Update hit rate metric; total is at least the one just counted
+        hits = self.counters.get(hits_name, 0)
+        total = hits + self.counters.get(misses_name, 0)
+        self.metrics["cache_hit_rate"].record(hits / total)
             
     def record_token_usage(self, provider: str, tokens: int):
         """Record token usage by provider."""
@@ -156,15 +215,9 @@ class PerformanceMonitor:
         # Record document count
         self.increment_counter(f"retriever_{retriever_name}_docs", docs_retrieved)
         
-    @asynccontextmanager
-    async def measure_latency(self, metric_name: str):
+    def measure_latency(self, metric_name: str) -> "_LatencyTimer":
         """Context manager to measure latency."""
-        start_time = time.time()
-        try:
-            yield
-        finally:
-            latency_ms = (time.time() - start_time) * 1000
-            self.record_latency(metric_name, latency_ms)
+        return _LatencyTimer(self, metric_name)
             
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get summary of all metrics."""
@@ -310,7 +363,7 @@ class PerformanceMonitor:
     def reset_metrics(self):
         """Reset all metrics (useful for testing)."""
         self.metrics.clear()
-        self.counters.clear()
+        self.counters = dict.fromkeys(self.KNOWN_COUNTERS, 0)
         self.gauges.clear()
         self._init_metrics()
         self.start_time = datetime.utcnow()
@@ -12,6 +12,10 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+_WHITESPACE = re.compile(r'\s+')
+_QUOTES = re.compile(r'[""''„"«»]')
+_DASHES = re.compile(r'[–—]')
+
 
 class ContentHasher:
     """Generates various hashes for content deduplication."""
@@ -22,17 +26,11 @@ class ContentHasher:
         # Normalize content for consistent hashing
         normalized = ContentHasher._normalize_content(content)
         
-        if algorithm == "md5":
-            hasher = hashlib.md5()
-        elif algorithm == "sha1":
-            hasher = hashlib.sha1()
-        elif algorithm == "sha256":
-            hasher = hashlib.sha256()
-        else:
+        if algorithm not in ("md5", "sha1", "sha256"):
             raise ValueError(f"Unsupported hash algorithm: {algorithm}")
             
-        hasher.update(normalized.encode('utf-8'))
-        return hasher.hexdigest()
+        # Hash the whole buffer in one call so OpenSSL runs uninterrupted
+        return hashlib.new(algorithm, normalized.encode('utf-8')).hexdigest()
         
     @staticmethod
     def generate_fuzzy_hash(content: str, n_grams: int = 5) -> str:
@@ -91,11 +89,11 @@ class ContentHasher:
     def _normalize_content(content: str) -> str:
         """Normalize content for consistent hashing."""
         # Remove extra whitespace
-        content = re.sub(r'\s+', ' ', content)
+        content = _WHITESPACE.sub(' ', content)
         
         # Remove punctuation variations
-        content = re.sub(r'[""''„"«»]', '"', content)
-        content = re.sub(r'[–—]', '-', content)
+        content = _QUOTES.sub('"', content)
+        content = _DASHES.sub('-', content)
         
         # Lowercase
         content = content.lower()
@@ -169,26 +167,39 @@ class DeduplicationService:
         Returns:
             Tuple of (is_duplicate, similarity_score, reason)
         """
-        # Check exact content hash first
-        hash1 = self.content_hasher.generate_content_hash(content)
-        hash2 = self.content_hasher.generate_content_hash(existing_content)
+        return self._is_duplicate(
+            content, existing_content, metadata1, metadata2,
+            self._hashes(content), self._hashes(existing_content)
+        )
         
-        if hash1 == hash2:
+    def _hashes(self, content: str) -> Tuple[str, str]:
+        """Exact and fuzzy hash of content."""
+        return (
+            self.content_hasher.generate_content_hash(content),
+            self.content_hasher.generate_fuzzy_hash(content)
+        )
+        
+    def _is_duplicate(
+        self,
+        content: str,
+        existing_content: str,
+        metadata1: Optional[Dict[str, Any]],
+        metadata2: Optional[Dict[str, Any]],
+        hashes1: Tuple[str, str],
+        hashes2: Tuple[str, str]
+    ) -> Tuple[bool, float, str]:
+        """is_duplicate with both sides' hashes already computed."""
+        # Check exact content hash first
+        if hashes1[0] == hashes2[0]:
             return True, 1.0, "exact_match"
             
-        # Check fuzzy hash for near-duplicates
-        fuzzy1 = self.content_hasher.generate_fuzzy_hash(content)
-        fuzzy2 = self.content_hasher.generate_fuzzy_hash(existing_content)
-        
-        if fuzzy1 == fuzzy2:
-            similarity = self.calculate_similarity(content, existing_content)
-            if similarity >= self.similarity_threshold:
-                return True, similarity, "fuzzy_match"
-                
-        # Calculate detailed similarity
+        # Calculate detailed similarity; a matching fuzzy hash only changes
+        # the reason reported for a near-duplicate
         similarity = self.calculate_similarity(content, existing_content)
         
         if similarity >= self.similarity_threshold:
+            if hashes1[1] == hashes2[1]:
+                return True, similarity, "fuzzy_match"
             return True, similarity, "high_similarity"
             
         # Check metadata for same source
@@ -221,6 +232,9 @@ class DeduplicationService:
         if n < 2:
             return []
             
+        # Hash each document once rather than once per pair
+        hashes = [self._hashes(doc.get(content_key, "")) for doc in documents]
+        
         # Build similarity matrix
         visited = set()
         duplicate_groups = []
@@ -241,9 +255,10 @@ class DeduplicationService:
                 doc2 = documents[j]
                 content2 = doc2.get(content_key, "")
                 
-                is_dup, score, reason = self.is_duplicate(
+                is_dup, score, reason = self._is_duplicate(
                     content1, content2,
-                    doc1.get("metadata"), doc2.get("metadata")
+                    doc1.get("metadata"), doc2.get("metadata"),
+                    hashes[i], hashes[j]
                 )
                 
                 if is_dup:
@@ -6,7 +6,7 @@ import json
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class TableStructure:
     """Represents a validated table structure."""
     headers: List[str]
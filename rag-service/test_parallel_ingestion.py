@@ -8,6 +8,7 @@ from datetime import datetime
 from app.core.config import settings
 from app.core.vectorstore import VectorStoreManager
 from app.pipelines.ingestion import IngestionPipeline
+from app.services.document_store import DocumentStore
 from app.models.documents import DocumentIngestionRequest
 
 
@@ -32,6 +33,11 @@ async def test_ingestion_performance():
         use_hierarchical_chunking=False
     )
     
+    # Listing taken before ingestion; it is cached per store version
+    document_store = DocumentStore(vector_store)
+    listing_before = await document_store.list_documents(page_size=1)
+    version_before = await vector_store.get_version()
+    
     # Test URL
     test_url = "https://www.canada.ca/en/department-national-defence/services/benefits-military/pay-pension-benefits/benefits/canadian-forces-temporary-duty-travel-instructions.html"
     
@@ -69,6 +75,22 @@ async def test_ingestion_performance():
     if response.error_details:
         print(f"  - Error details: {response.error_details}")
     
+    # A listing taken after ingestion must see the new chunks, not the cached page
+    if response.status == "success" and response.chunks_created:
+        listing_after = await document_store.list_documents(page_size=1)
+        new_chunks = await document_store.list_documents(
+            page_size=1,
+            filters={"parent_id": response.document_id}
+        )
+        version_after = await vector_store.get_version()
+        print("\nListing after ingestion:")
+        print(f"  - Store version: {version_before} -> {version_after}")
+        print(f"  - Total: {listing_before.total} -> {listing_after.total}")
+        print(f"  - Chunks listed for new document: {new_chunks.total}")
+        assert version_after != version_before, "ingestion did not bump the store version"
+        assert listing_after is not listing_before, "listing served from the pre-ingestion cache"
+        assert new_chunks.documents, "new document missing from listing"
+    
     # Cleanup
     await pipeline.cleanup()
     await vector_store.close()